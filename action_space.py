@@ -1,18 +1,21 @@
+from geometry import GEOMETRY_5x5, GEOMETRY_9x9, GEOMETRY_19x19
+
 def make_action_map(size: int):
     m = { (size * x + y): (x, y) for y in range(size) for x in range(size) }
     m[len(m)] = 'pass'
     m[len(m)] = 'resign'
     return m
 
-action_map_5x5 = make_action_map(5)
-reverse_action_map_5x5 = {v: k for k, v in action_map_5x5.items()}
+# the maps of the sizes the website is measured for are the read only tables of their geometries
+action_map_5x5 = GEOMETRY_5x5.action_map
+reverse_action_map_5x5 = GEOMETRY_5x5.reverse_action_map
 
-action_map_9x9 = make_action_map(9)
-reverse_action_map_9x9 = {v: k for k, v in action_map_9x9.items()}
+action_map_9x9 = GEOMETRY_9x9.action_map
+reverse_action_map_9x9 = GEOMETRY_9x9.reverse_action_map
 
 
-action_map_19x19 = make_action_map(19)
-reverse_action_map_19x19 = {v: k for k, v in action_map_19x19.items()}
+action_map_19x19 = GEOMETRY_19x19.action_map
+reverse_action_map_19x19 = GEOMETRY_19x19.reverse_action_map
 
 """
 action map 19x19 for reference
@@ -0,0 +1,436 @@
+import random
+
+import numpy as np
+
+from local_simulator import LocalSimulator
+from local_simulator import Color, format_result
+from local_simulator import EMPTY, BLACK, WHITE
+from playout import PlayoutPolicy
+from playout import PlayoutLimits, MAX_KO_MOVES
+
+# every row of a board is one integer with bit x set for a stone at x, so a board fits in height integers
+ROW_TYPE = np.uint32
+
+def spread(rows, full):
+    # the points of rows and their neighbors. rows are along the last axis
+    grown = rows | ((rows << 1) & full) | (rows >> 1)
+    grown[..., 1:] |= rows[..., :-1]
+    grown[..., :-1] |= rows[..., 1:]
+    return grown
+
+def flood(seeds, stones, next_to_empty, full):
+    # the chains of stones that contain a seed, for every board of the batch at once, and whether each of
+    # them has a liberty. a chain stops growing once a liberty is found, only chains without liberties
+    # are complete. chains that are done are dropped from the arrays the next step works on
+    chains = seeds & stones
+    has_liberties = np.zeros(len(chains), dtype=bool)
+    active = np.arange(len(chains))
+    reached = chains
+
+    while len(active):
+        grown = spread(reached, full) & stones
+        free = (grown & next_to_empty).any(axis=-1)
+        growing = ~free & (grown != reached).any(axis=-1)
+        chains[active] = grown
+        has_liberties[active] = free
+        active = active[growing]
+        reached = grown[growing]
+        stones = stones[growing]
+        next_to_empty = next_to_empty[growing]
+
+    return chains, has_liberties
+
+def count_stones(rows):
+    return np.bitwise_count(rows).sum(axis=-1, dtype=np.int32)
+
+def fill(seeds, points, full):
+    # the points connected to a seed through points, without the early stop of flood
+    filled = seeds & points
+    while True:
+        grown = spread(filled, full) & points
+        if np.array_equal(grown, filled):
+            return filled
+        filled = grown
+
+def area_scores(stones, full):
+    # black area minus white area of boards of shape (..., 2, height). the empty points a color reaches
+    # through empty points are its territory unless the other color reaches them too
+    black = stones[..., 0, :]
+    white = stones[..., 1, :]
+    empty = full & ~(black | white)
+    black_reach = fill(spread(black, full), empty, full)
+    white_reach = fill(spread(white, full), empty, full)
+    return count_stones(black | (black_reach & ~white_reach)) - count_stones(white | (white_reach & ~black_reach))
+
+class BatchSimulator:
+
+    # plays the random playouts of many QuantumGo games in lockstep, with the same rules and move choice
+    # as PlayoutPolicy: a random point that is empty on both subgames, not a ko recapture, does not fill
+    # an eye and is not suicide, or a pass when there is none. every step plays one move in every
+    # unfinished game with a few array operations for the whole batch. the stones are kept as bitboards
+    # of shape (N, 2, 2, height), one row integer per game, subgame, color and row, so capture and
+    # suicide checks only flood the chains next to the move. get_boards returns the usual
+    # (N, 2, height, width) int8 boards
+
+    def __init__(self, games, seed=None, limits=None):
+        first = games[0].subgames[0]
+        self.width = first.width
+        self.height = first.height
+        self.komi = games[0].komi
+        self.limits = PlayoutLimits() if limits is None else limits
+        self.max_moves = self.limits.get_max_moves(self.width, self.height)
+        self.full = ROW_TYPE((1 << self.width) - 1)
+        self.rng = np.random.default_rng(seed)
+        count = len(games)
+
+        self.stones = np.zeros((count, 2, 2, self.height), dtype=ROW_TYPE)
+        self.current_player = np.zeros(count, dtype=np.int8)
+        self.black_captures = np.zeros(count, dtype=np.int32)
+        self.white_captures = np.zeros(count, dtype=np.int32)
+        self.consecutive_passes = np.zeros(count, dtype=np.int32)
+        self.move_number = np.zeros(count, dtype=np.int32)
+        self.ko_moves = np.zeros(count, dtype=np.int32)
+        # ko point of every subgame as an index into the flattened board, -1 if there is none
+        self.ko_points = np.full((count, 2), -1, dtype=np.int32)
+        self.quantum_stones = np.zeros((count, 2), dtype=np.int32)
+        self.results = [None] * count
+
+        for index, game in enumerate(games):
+            for subgame_index, subgame in enumerate(game.subgames):
+                for point in subgame.points():
+                    color = subgame.board[point]
+                    if color != EMPTY:
+                        x, y = subgame.coord(point)
+                        self.stones[index, subgame_index, color - 1, y] |= ROW_TYPE(1 << x)
+                self.ko_points[index, subgame_index] = self.index(subgame.coord(subgame.ko_point)) if subgame.ko_point else -1
+            self.current_player[index] = game.current_player.value
+            self.black_captures[index] = game.captures[Color.BLACK]
+            self.white_captures[index] = game.captures[Color.WHITE]
+            self.consecutive_passes[index] = game.consecutive_passes
+            self.move_number[index] = game.move_number
+            self.quantum_stones[index] = [self.index(stone) for stone in game.quantum_stones]
+            self.results[index] = game.result
+
+        self.quantum_rows = np.zeros((count, self.height), dtype=ROW_TYPE)
+        for position in range(2):
+            stone_y, stone_x = np.divmod(self.quantum_stones[:, position], self.width)
+            self.quantum_rows[np.arange(count), stone_y] |= ROW_TYPE(1) << stone_x.astype(ROW_TYPE)
+
+    def index(self, coord):
+        return coord[1] * self.width + coord[0]
+
+    def get_boards(self):
+
+        bits = (self.stones[..., None] >> np.arange(self.width, dtype=ROW_TYPE)) & 1
+        return (bits[:, :, 0] * BLACK + bits[:, :, 1] * WHITE).astype(np.int8)
+
+    def run(self):
+
+        # plays every game until both players pass or the limits stop it and returns the results in the order
+        # of the games
+        unfinished = self.get_unfinished()
+
+        while unfinished.any():
+            games = np.flatnonzero(unfinished)
+            forced_pass = (self.move_number[games] >= self.max_moves) | (self.ko_moves[games] >= MAX_KO_MOVES)
+            played = np.zeros(len(games), dtype=bool)
+            played[~forced_pass] = self.play_random_moves(games[~forced_pass])
+            self.end_moves(games, played)
+            unfinished[games] = self.get_unfinished()[games]
+
+        return self.results
+
+    def play(self, actions):
+
+        # plays the given action in every unfinished game, width * height is a pass
+        games = np.flatnonzero(self.get_unfinished())
+        actions = np.asarray(actions)[games]
+        played = actions != self.width * self.height
+        x, y = np.divmod(actions[played], self.height)
+        if self.play_moves(games[played], y, x).any():
+            raise ValueError("Suicide is not supported by the batch simulator.")
+        self.end_moves(games, played)
+
+    def get_unfinished(self):
+        return np.array([result is None for result in self.results])
+
+    def end_moves(self, games, played):
+
+        # bookkeeping after a move in every game, played tells the games with a stone from those that passed
+        passed = games[~played]
+        moved = games[played]
+
+        self.consecutive_passes[passed] += 1
+        self.ko_points[passed] = -1
+        self.ko_moves[passed] += 1
+        self.consecutive_passes[moved] = 0
+        self.ko_moves[moved] = np.where((self.ko_points[moved] >= 0).any(axis=1), self.ko_moves[moved] + 1, 0)
+
+        self.move_number[games] += 1
+        self.current_player[games] = BLACK + WHITE - self.current_player[games]
+
+        ended = passed[self.consecutive_passes[passed] == 2]
+        if len(ended):
+            # area scoring on both subgames, each of them with komi for white
+            scores = (area_scores(self.stones[ended], self.full) - self.komi).sum(axis=1)
+            for index, score in zip(ended, scores):
+                self.results[index] = format_result(float(score))
+
+        if self.limits.get_mercy() is not None:
+            lead = np.abs(self.black_captures[moved] - self.white_captures[moved])
+            for index in moved[lead >= self.limits.get_mercy()]:
+                self.results[index] = self.limits.get_mercy_result(self.black_captures[index], self.white_captures[index])
+
+    def get_candidates(self, games):
+
+        # empty on both subgames, not a ko recapture and not an eye of the player to move on either subgame
+        stones = self.stones[games]
+        rows = np.arange(len(games))
+        full = self.full
+        candidates = full & ~np.bitwise_or.reduce(stones.reshape(len(games), 4, self.height), axis=1)
+
+        # an eye is a point whose on-board neighbors are all stones of the player to move
+        own = stones[rows, :, self.current_player[games] - 1]
+        left = (own << 1) | 1
+        right = (own >> 1) | ROW_TYPE(1 << (self.width - 1))
+        above = np.full_like(own, full)
+        above[..., 1:] = own[..., :-1]
+        below = np.full_like(own, full)
+        below[..., :-1] = own[..., 1:]
+        eyes = left & right & above & below
+        candidates &= ~(eyes[:, 0] | eyes[:, 1])
+
+        for subgame_index in range(2):
+            ko_points = self.ko_points[games, subgame_index]
+            has_ko = ko_points >= 0
+            y, x = np.divmod(ko_points[has_ko], self.width)
+            candidates[rows[has_ko], y] &= ~(ROW_TYPE(1) << x.astype(ROW_TYPE))
+
+        return candidates
+
+    def play_random_moves(self, games):
+
+        # plays a random candidate in every game and returns which games played a stone, the others have to
+        # pass. candidates are tried in a random order until one is not suicide, which picks uniformly among
+        # the legal ones. every round tries twice as many candidates per game as the one before, so games
+        # with many suicide points left do not need a round for each of them
+        played = np.zeros(len(games), dtype=bool)
+        rejected = np.zeros((len(games), self.height), dtype=ROW_TYPE)
+        pending = np.arange(len(games))
+        columns = np.arange(self.width, dtype=ROW_TYPE)
+        tries = 1
+
+        while len(pending):
+            candidates = self.get_candidates(games[pending]) & ~rejected[pending]
+            has_candidates = candidates.any(axis=1)
+            pending = pending[has_candidates]
+            candidates = candidates[has_candidates]
+            if not len(pending):
+                break
+
+            if tries == 1:
+                y, x = self.sample_candidates(candidates)
+                is_candidate = np.ones((len(pending), 1), dtype=bool)
+            else:
+                # random priorities for every candidate, the highest ones are tried in order
+                bits = ((candidates[..., None] >> columns) & 1).astype(bool).reshape(len(pending), -1)
+                draws = np.where(bits, self.rng.random(bits.shape), -1.0)
+                order = np.argpartition(-draws, tries - 1, axis=1)[:, :tries]
+                order = np.take_along_axis(order, np.argsort(-np.take_along_axis(draws, order, axis=1), axis=1), axis=1)
+                is_candidate = np.take_along_axis(draws, order, axis=1) >= 0
+                y, x = np.divmod(order.ravel(), self.width)
+
+            tried = np.repeat(games[pending], tries)
+            stones, ko_points, captured, suicide = self.try_moves(tried, y, x)
+
+            legal = is_candidate & ~suicide.reshape(len(pending), tries)
+            found = legal.any(axis=1)
+            chosen = (np.arange(len(pending)) * tries + legal.argmax(axis=1))[found]
+            self.commit_moves(games[pending[found]], stones[chosen], ko_points[chosen], captured[chosen])
+            played[pending[found]] = True
+
+            missed = np.repeat(~found, tries) & is_candidate.ravel()
+            np.bitwise_or.at(rejected, (np.repeat(pending, tries)[missed], y[missed]), ROW_TYPE(1) << x[missed].astype(ROW_TYPE))
+            pending = pending[~found]
+            tries *= 2
+
+        return played
+
+    def sample_candidates(self, candidates):
+
+        # the point of one uniformly chosen candidate per game. the rank of the chosen candidate picks the
+        # row, then halves of the row are skipped by their number of candidates
+        rows = np.arange(len(candidates))
+        counts = np.bitwise_count(candidates).astype(np.int32)
+        row_ends = np.cumsum(counts, axis=1)
+        rank = (self.rng.random(len(candidates)) * row_ends[:, -1]).astype(np.int32)
+        y = (row_ends <= rank[:, None]).sum(axis=1)
+        rank -= row_ends[rows, y] - counts[rows, y]
+
+        row = candidates[rows, y]
+        x = np.zeros(len(candidates), dtype=np.int32)
+        for shift in (16, 8, 4, 2, 1):
+            lower = np.bitwise_count(row & ROW_TYPE((1 << shift) - 1)).astype(np.int32)
+            upper = rank >= lower
+            rank -= np.where(upper, lower, 0)
+            x += np.where(upper, shift, 0)
+            row = np.where(upper, row >> shift, row)
+
+        return y, x
+
+    def play_moves(self, games, y, x):
+
+        # plays one stone per game and returns the games where it would be suicide, those are left as they were
+        stones, ko_points, captured, suicide = self.try_moves(games, y, x)
+        keep = ~suicide
+        self.commit_moves(games[keep], stones[keep], ko_points[keep], captured[keep])
+        return suicide
+
+    def commit_moves(self, games, stones, ko_points, captured):
+
+        self.stones[games] = stones
+        self.ko_points[games] = ko_points
+        self.black_captures[games] += np.where(self.current_player[games] == BLACK, captured, 0)
+        self.white_captures[games] += np.where(self.current_player[games] == WHITE, captured, 0)
+
+    def try_moves(self, games, y, x):
+
+        # the stones of the games after playing one stone on both subgames and removing the captured stones,
+        # with the new ko points, the number of captured stones and whether the move is suicide on either
+        # subgame. a game can appear more than once. the simulator itself is not changed
+        stones = self.stones[games]
+        full = self.full
+        rows = np.arange(len(games))
+        ko_points = np.full((len(games), 2), -1, dtype=np.int32)
+        captured = np.zeros(len(games), dtype=np.int32)
+        suicide = np.zeros(len(games), dtype=bool)
+        own_index = self.current_player[games] - 1
+        other_index = 1 - own_index
+
+        move = np.zeros((len(games), self.height), dtype=ROW_TYPE)
+        move[rows, y] = ROW_TYPE(1) << x.astype(ROW_TYPE)
+
+        # the move's neighbors in the order of the neighbor table: left, right, above, below
+        neighbor_y = np.stack([y, y, y - 1, y + 1], axis=1)
+        neighbor_x = np.stack([x - 1, x + 1, x, x], axis=1)
+        on_board = (neighbor_x >= 0) & (neighbor_x < self.width) & (neighbor_y >= 0) & (neighbor_y < self.height)
+        neighbor_y = np.clip(neighbor_y, 0, self.height - 1)
+        neighbor_x = np.clip(neighbor_x, 0, self.width - 1).astype(ROW_TYPE)
+        neighbor_rows = rows[:, None]
+
+        def at_neighbors(rows_of_bits):
+            return ((rows_of_bits[neighbor_rows, neighbor_y] >> neighbor_x) & 1).astype(bool) & on_board
+
+        for subgame_index in range(2):
+            own = stones[rows, subgame_index, own_index] | move
+            other = stones[rows, subgame_index, other_index]
+            empty = full & ~(own | other)
+            # the points next to an empty point, a chain with one of them has a liberty
+            next_to_empty = spread(empty, full)
+
+            # most chains next to the move have a liberty next to the seed, only the others are flooded.
+            # slots 0 to 3 are the opponent chains through the neighbors, slot 4 is the move's own chain
+            empty_neighbors = at_neighbors(empty)
+            needs_flood = np.zeros((len(games), 5), dtype=bool)
+            needs_flood[:, :4] = at_neighbors(other) & ~at_neighbors(next_to_empty)
+            needs_flood[:, 4] = ~empty_neighbors.any(axis=1)
+            game_rows, slots = np.nonzero(needs_flood)
+
+            seeds = np.zeros((len(game_rows), self.height), dtype=ROW_TYPE)
+            is_move = slots == 4
+            seed_y = np.where(is_move, y[game_rows], neighbor_y[game_rows, np.minimum(slots, 3)])
+            seed_x = np.where(is_move, x[game_rows], neighbor_x[game_rows, np.minimum(slots, 3)])
+            seeds[np.arange(len(game_rows)), seed_y] = ROW_TYPE(1) << seed_x.astype(ROW_TYPE)
+            chain_stones = np.where(is_move[:, None], own[game_rows], other[game_rows])
+            chains, has_liberties = flood(seeds, chain_stones, next_to_empty[game_rows], full)
+
+            is_dead = ~has_liberties & ~is_move
+            dead = np.zeros((len(games), self.height), dtype=ROW_TYPE)
+            np.bitwise_or.at(dead, game_rows[is_dead], chains[is_dead])
+            dead_count = count_stones(dead)
+
+            surrounded = np.zeros(len(games), dtype=bool)
+            surrounded[game_rows[is_move & ~has_liberties]] = True
+            suicide |= surrounded & (dead_count == 0)
+            captured += dead_count
+            stones[rows, subgame_index, own_index] = own
+            stones[rows, subgame_index, other_index] = other & ~dead
+
+            # a single stone that captured a single stone and is left with one liberty is in ko
+            lonely = ~at_neighbors(own).any(axis=1)
+            liberties = (empty_neighbors | at_neighbors(dead)).sum(axis=1)
+            ko = (dead_count == 1) & lonely & (liberties == 1)
+            ko_y = (dead[ko] != 0).argmax(axis=1)
+            ko_x = np.bitwise_count(dead[ko][np.arange(len(ko_y)), ko_y] - ROW_TYPE(1))
+            ko_points[ko, subgame_index] = ko_y * self.width + ko_x
+
+            for row in np.flatnonzero((dead & self.quantum_rows[games]).any(axis=1)):
+                dead_chains = np.zeros((4, self.height), dtype=ROW_TYPE)
+                for chain, slot in zip(chains[is_dead & (game_rows == row)], slots[is_dead & (game_rows == row)]):
+                    dead_chains[slot] = chain
+                self.remove_quantum_partner(stones[row], self.quantum_stones[games[row]], dead_chains, y[row], x[row])
+
+        return stones, ko_points, captured, suicide
+
+    def remove_quantum_partner(self, stones, quantum_stones, dead_chains, y, x):
+
+        # a captured quantum stone takes the other quantum stone off a subgame. as in
+        # QuantumGo.remove_captures, that is the first subgame when the captured chain was found through
+        # the first on-board neighbor of the move and the second one otherwise
+        on_board = [x > 0, x < self.width - 1, y > 0, y < self.height - 1]
+        found = []
+        neighbor_index = 0
+
+        for direction in range(4):
+            if not on_board[direction]:
+                continue
+            chain = dead_chains[direction]
+            # a chain next to the move through several neighbors is only removed through the first one
+            if chain.any() and not any(np.array_equal(chain, other) for other in found):
+                found.append(chain)
+                for position, stone in enumerate(quantum_stones):
+                    stone_y, stone_x = divmod(int(stone), self.width)
+                    if int(chain[stone_y]) >> stone_x & 1:
+                        other_y, other_x = divmod(int(quantum_stones[1 - position]), self.width)
+                        subgame_index = 0 if neighbor_index == 0 else 1
+                        stones[subgame_index, :, other_y] &= ~ROW_TYPE(1 << other_x)
+            neighbor_index += 1
+
+def simulate_batch(board_states, game=None, limits=None):
+
+    # the same playouts as playout.simulate for a list of board states, played in lockstep. game is an
+    # optional position reached by the first moves of every board state
+    results = [None] * len(board_states)
+    games = []
+    indices = []
+
+    for index, board_state in enumerate(board_states):
+
+        total_moves = len(board_state)
+        simulator = LocalSimulator(None if game is None else game.copy())
+
+        if total_moves > 0 and board_state[-1] == simulator.game.geometry.resign_action:
+            results[index] = 'B' if total_moves % 2 == 0 else 'W'
+            continue
+
+        simulator.play_moves(board_state[simulator.game.move_number:])
+
+        # the quantum stones are placed one game at a time, the batch only plays on the subgames
+        policy = PlayoutPolicy(simulator.game)
+        while simulator.game.round < 2 and simulator.get_result() is None:
+            simulator.play_move(policy.select_action())
+
+        if simulator.get_result() is not None:
+            results[index] = simulator.get_result()
+            continue
+
+        games.append(simulator.game)
+        indices.append(index)
+
+    if games:
+        # seeded from random so a seeded search plays the same batch playouts
+        batch = BatchSimulator(games, random.getrandbits(32), limits)
+        for index, result in zip(indices, batch.run()):
+            results[index] = result
+
+    return results
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+from geometry import GEOMETRY_19x19
+from bitboard import BitboardQuantumGo
+from engine import MCTS, Node
+from local_simulator import LocalSimulator
+from playout import record_playout
+from rollout_pool import LocalRollouts
+
+# offline measurements of the simulators and the search, printed as JSON so runs on different versions and
+# with different simulators can be compared. nothing here needs a browser
+
+# moves into a recorded game at which the dense positions for the group and capture measurements are taken
+DENSE_POSITION_MOVE = 250
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="Measure simulator and search throughput without a browser")
+    parser.add_argument('--games', type=int, default=20, help="Number of recorded random games to replay and play out")
+    parser.add_argument('--search-playouts', type=int, nargs='+', default=[500], help="Playout budgets of the search measurements")
+    parser.add_argument('--simulators', nargs='+', choices=['python', 'numpy', 'bitboard'], default=['python', 'numpy', 'bitboard'], help="Simulators to measure playouts and search with")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes running playouts in the search measurements")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed, every run plays the same games")
+    parser.add_argument('--output', default=None, help="File to write the JSON results to instead of printing them")
+    return parser.parse_args()
+
+def record_games(count):
+
+    # the moves of random playouts from the empty board, with the moves that captured stones
+    return [record_playout(LocalSimulator()) for _ in range(count)]
+
+def replay(actions):
+
+    simulator = LocalSimulator()
+    simulator.play_moves(actions)
+    return simulator.game
+
+def measure_play_move(games):
+
+    moves = sum(len(actions) for actions, _ in games)
+
+    start = time.perf_counter()
+    for actions, _ in games:
+        replay(actions)
+    python_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for actions, _ in games:
+        game = BitboardQuantumGo()
+        for action in actions:
+            game.play_action(action)
+    bitboard_seconds = time.perf_counter() - start
+
+    return {
+        'moves': moves,
+        'python_moves_per_second': moves / python_seconds,
+        'bitboard_moves_per_second': moves / bitboard_seconds,
+    }
+
+def measure_groups(games):
+
+    # get_group on every point of dense positions, stones and empty regions alike
+    positions = [replay(actions[:DENSE_POSITION_MOVE]) for actions, _ in games if len(actions) > DENSE_POSITION_MOVE]
+    coords = [(x, y) for x in range(GEOMETRY_19x19.width) for y in range(GEOMETRY_19x19.height)]
+    calls = 0
+
+    start = time.perf_counter()
+    for game in positions:
+        for subgame in game.subgames:
+            for coord in coords:
+                game.get_group(subgame, coord)
+                calls += 1
+    seconds = time.perf_counter() - start
+
+    return {'positions': len(positions), 'calls': calls, 'calls_per_second': calls / seconds if calls else None}
+
+def measure_captures(games):
+
+    # the moves of the recorded games that captured stones, played on copies of the positions before them
+    positions = []
+    for actions, capturing_moves in games:
+        simulator = LocalSimulator()
+        played = 0
+        for index in capturing_moves:
+            simulator.play_moves(actions[played:index])
+            played = index
+            positions.append((simulator.game.copy(), actions[index]))
+
+    games_to_play = [(game.copy(), action) for game, action in positions]
+    start = time.perf_counter()
+    for game, action in games_to_play:
+        LocalSimulator(game).play_move(action)
+    python_seconds = time.perf_counter() - start
+
+    games_to_play = [(BitboardQuantumGo.from_game(game), action) for game, action in positions]
+    start = time.perf_counter()
+    for game, action in games_to_play:
+        game.play_action(action)
+    bitboard_seconds = time.perf_counter() - start
+
+    return {
+        'captures': len(positions),
+        'python_captures_per_second': len(positions) / python_seconds if positions else None,
+        'bitboard_captures_per_second': len(positions) / bitboard_seconds if positions else None,
+    }
+
+def measure_playouts(simulator, count):
+
+    # random playouts from the empty board after the quantum stones, the python simulator through Node.simulate
+    board_states = [[0, 20]] * count
+
+    start = time.perf_counter()
+    if simulator == 'python':
+        node = Node([], GEOMETRY_19x19.action_map.copy(), None, 0, 0, None)
+        results = [node.simulate(board_state) for board_state in board_states]
+    else:
+        results = LocalRollouts(simulator).run(board_states)
+    seconds = time.perf_counter() - start
+
+    return {
+        'simulator': simulator,
+        'playouts': count,
+        'playouts_per_second': count / seconds,
+        'black_wins': sum(result[0] == 'B' for result in results),
+    }
+
+def count_nodes(root):
+
+    nodes = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        stack.extend(node.get_children())
+    return nodes
+
+def measure_search(simulator, playouts, workers, seed):
+
+    mcts = MCTS(playouts=playouts, workers=workers, seed=seed, simulator=simulator)
+    root = Node([], GEOMETRY_19x19.action_map.copy(), None, 0, 0, None)
+    root.create_children(root.get_board_state(), root.get_action_space(), root)
+
+    try:
+        start = time.perf_counter()
+        num_playouts = mcts.search(root)
+        seconds = time.perf_counter() - start
+    finally:
+        mcts.close()
+
+    nodes = count_nodes(root)
+
+    return {
+        'simulator': simulator,
+        'workers': workers,
+        'budget': playouts,
+        'playouts': num_playouts,
+        'nodes': nodes,
+        'seconds': seconds,
+        'playouts_per_second': num_playouts / seconds,
+        'nodes_per_second': nodes / seconds,
+    }
+
+def get_version():
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+
+    args = arg_parser()
+    random.seed(args.seed)
+    games = record_games(args.games)
+
+    report = {
+        'version': get_version(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'play_move': measure_play_move(games),
+        'get_group': measure_groups(games),
+        'captures': measure_captures(games),
+        'playouts': [],
+        'search': [],
+    }
+
+    for simulator in args.simulators:
+        random.seed(args.seed)
+        report['playouts'].append(measure_playouts(simulator, args.games))
+        for playouts in args.search_playouts:
+            report['search'].append(measure_search(simulator, playouts, args.workers, args.seed))
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+
+if __name__ == '__main__':
+    main()
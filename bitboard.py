@@ -0,0 +1,414 @@
+import random
+from typing import List, Optional
+
+from local_simulator import Color, Coordinate, QuantumGo, format_result
+from local_simulator import EMPTY, BLACK, WHITE
+from playout import PlayoutLimits, MAX_KO_MOVES
+from geometry import make_geometry
+
+_geometries = {}
+
+def make_bitboard_geometry(width: int, height: int) -> "BitboardGeometry":
+    key = (width, height)
+    if key not in _geometries:
+        _geometries[key] = BitboardGeometry(width, height)
+    return _geometries[key]
+
+class BitboardGeometry:
+    # point (x, y) is bit y * stride + x of a board integer. stride is one more than the width, so the unused
+    # bit at the end of every row keeps stones shifted sideways from wrapping onto the next row
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        self.bits = [self.bit((x, y)) for y in range(height) for x in range(width)]
+        self.board_mask = sum(1 << bit for bit in self.bits)
+        # on-board neighbors of every point, the neighbors of the board geometry in bits: left, right, above, below
+        board_geometry = make_geometry(width, height)
+        self.neighbor_bits = [()] * (self.stride * height)
+        self.neighbor_masks = [0] * (self.stride * height)
+        for action, neighbors in enumerate(board_geometry.neighbors):
+            bit = self.bit(board_geometry.moves[action])
+            self.neighbor_bits[bit] = tuple(self.bit(board_geometry.moves[neighbor]) for neighbor in neighbors)
+            self.neighbor_masks[bit] = sum(1 << neighbor for neighbor in self.neighbor_bits[bit])
+
+    def bit(self, coord: Coordinate) -> int:
+        return coord[1] * self.stride + coord[0]
+
+    def coord(self, bit: int) -> Coordinate:
+        y, x = divmod(bit, self.stride)
+        return (x, y)
+
+    def neighbors(self, stones: int) -> int:
+        stride = self.stride
+        return ((stones << 1) | (stones >> 1) | (stones << stride) | (stones >> stride)) & self.board_mask
+
+    def flood(self, seeds: int, stones: int) -> int:
+        # the chains of stones that contain a seed
+        stride = self.stride
+        board_mask = self.board_mask
+        chain = seeds & stones
+        while True:
+            grown = (chain | (chain << 1) | (chain >> 1) | (chain << stride) | (chain >> stride)) & board_mask & stones
+            if grown == chain:
+                return chain
+            chain = grown
+
+    def has_liberties(self, seeds: int, stones: int, liberties: int) -> bool:
+        # whether the chains of stones that contain a seed touch a liberty. stops growing the chains as
+        # soon as they do, most chains in a playout find a liberty in a step or two
+        stride = self.stride
+        board_mask = self.board_mask
+        chain = seeds & stones
+        while True:
+            grown = (chain | (chain << 1) | (chain >> 1) | (chain << stride) | (chain >> stride)) & board_mask
+            if grown & liberties:
+                return True
+            grown &= stones
+            if grown == chain:
+                return False
+            chain = grown
+
+def nth_bit(stones: int, n: int) -> int:
+    # the bit of stones with n set bits below it, found by halving the range of bits it can be in
+    low, high = 0, stones.bit_length()
+    while high - low > 1:
+        middle = (low + high) >> 1
+        if (stones & ((1 << middle) - 1)).bit_count() > n:
+            high = middle
+        else:
+            low = middle
+    return low
+
+class BitboardSubgame:
+    __slots__ = ('geometry', 'stones', 'ko_point')
+
+    def __init__(self, geometry: BitboardGeometry):
+        self.geometry = geometry
+        # the stones of each color as one integer, indexed by the color value. index 0 is unused
+        self.stones = [0, 0, 0]
+        # bit of a stone just captured in a ko, it cannot be retaken on the next move. -1 if there is none
+        self.ko_point = -1
+
+    def occupied(self) -> int:
+        return self.stones[BLACK] | self.stones[WHITE]
+
+    def empty(self) -> int:
+        return self.geometry.board_mask & ~(self.stones[BLACK] | self.stones[WHITE])
+
+    def at(self, coord: Coordinate) -> Color:
+        bit = self.geometry.bit(coord)
+        for color in (BLACK, WHITE):
+            if self.stones[color] >> bit & 1:
+                return Color(color)
+        return Color.EMPTY
+
+    def set(self, coord: Coordinate, color: Color):
+        point = 1 << self.geometry.bit(coord)
+        self.stones[BLACK] &= ~point
+        self.stones[WHITE] &= ~point
+        if color != Color.EMPTY:
+            self.stones[color.value] |= point
+
+    def area_score(self) -> int:
+        # black area minus white area. the empty points a color reaches through empty points are its
+        # territory unless the other color reaches them too
+        geometry = self.geometry
+        black, white = self.stones[BLACK], self.stones[WHITE]
+        empty = geometry.board_mask & ~(black | white)
+        black_reach = geometry.flood(geometry.neighbors(black), empty)
+        white_reach = geometry.flood(geometry.neighbors(white), empty)
+        return ((black | (black_reach & ~white_reach)).bit_count()
+                - (white | (white_reach & ~black_reach)).bit_count())
+
+    def serialize(self) -> List[List[Color]]:
+        return [[self.at((x, y)) for x in range(self.geometry.width)] for y in range(self.geometry.height)]
+
+    def copy(self) -> "BitboardSubgame":
+        subgame = BitboardSubgame.__new__(BitboardSubgame)
+        subgame.geometry = self.geometry
+        subgame.stones = self.stones.copy()
+        subgame.ko_point = self.ko_point
+        return subgame
+
+class BitboardQuantumGo:
+    # the rules of QuantumGo with every subgame stored as two integers, one bit per point and color.
+    # liberties and captures come from flood fills over the integers, and a copy is a copy of a few ints.
+    # there is no position hash, positions that need one are kept as QuantumGo
+    def __init__(self, width: int = 19, height: int = 19, komi: float = 6.5):
+        self.geometry = make_bitboard_geometry(width, height)
+        # action numbers of the board size, geometry is the bit layout
+        self.board_geometry = make_geometry(width, height)
+        self.subgames = [BitboardSubgame(self.geometry), BitboardSubgame(self.geometry)]
+        self.quantum_stones: List[Coordinate] = []
+        self.komi = komi
+        self.round = 0
+        self.phase = "play"
+        self.result = None
+        self.current_player = Color.BLACK
+        self.captures = {Color.BLACK: 0, Color.WHITE: 0}
+        self.consecutive_passes = 0
+        self.move_number = 0
+
+    @classmethod
+    def from_game(cls, game: QuantumGo) -> "BitboardQuantumGo":
+        first = game.subgames[0]
+        bitboard_game = cls(first.width, first.height, game.komi)
+        for subgame, bitboard_subgame in zip(game.subgames, bitboard_game.subgames):
+            for point in subgame.points():
+                if subgame.board[point] != EMPTY:
+                    bitboard_subgame.stones[subgame.board[point]] |= 1 << bitboard_game.geometry.bit(subgame.coord(point))
+            if subgame.ko_point:
+                bitboard_subgame.ko_point = bitboard_game.geometry.bit(subgame.coord(subgame.ko_point))
+        bitboard_game.quantum_stones = game.quantum_stones.copy()
+        bitboard_game.round = game.round
+        bitboard_game.phase = game.phase
+        bitboard_game.result = game.result
+        bitboard_game.current_player = game.current_player
+        bitboard_game.captures = game.captures.copy()
+        bitboard_game.consecutive_passes = game.consecutive_passes
+        bitboard_game.move_number = game.move_number
+        return bitboard_game
+
+    def play_action(self, action: int):
+        # actions as used by the engine: height * x + y for a point, then pass and resign
+        if action == self.board_geometry.pass_action:
+            move = "pass"
+        elif action == self.board_geometry.resign_action:
+            move = "resign"
+        else:
+            move = divmod(action, self.geometry.height)
+        self.play_move(self.current_player, move)
+
+    def play_move(self, player: Color, move: object):
+        if self.phase == "gameover":
+            raise ValueError("Game is already over.")
+
+        if player != self.current_player:
+            raise ValueError(f"It's {self.current_player.name}'s turn to play.")
+
+        if isinstance(move, str):
+            if move == "resign":
+                self.phase = "gameover"
+                self.result = "B+R" if player == Color.WHITE else "W+R"
+                self.move_number += 1
+                return
+            elif move == "pass":
+                self.move_number += 1
+                self.consecutive_passes += 1
+                for subgame in self.subgames:
+                    subgame.ko_point = -1
+                if self.consecutive_passes == 2:
+                    self.phase = "gameover"
+                    self.result = format_result(self.score())
+                    return
+                else:
+                    self.current_player = Color.WHITE if self.current_player == Color.BLACK else Color.BLACK
+                    return
+            else:
+                raise ValueError("Invalid move type")
+
+        self.consecutive_passes = 0
+
+        if self.round < 2:
+            self.quantum_stones.append(move)
+            if self.round == 1:
+                self.subgames[0].set(self.quantum_stones[0], Color.BLACK)
+                self.subgames[0].set(self.quantum_stones[1], Color.WHITE)
+                self.subgames[1].set(self.quantum_stones[1], Color.BLACK)
+                self.subgames[1].set(self.quantum_stones[0], Color.WHITE)
+        else:
+            for subgame in self.subgames:
+                self.play_subgame_move(subgame, player, move)
+
+        self.round += 1
+        self.move_number += 1
+        self.current_player = Color.WHITE if self.current_player == Color.BLACK else Color.BLACK
+
+    def play_subgame_move(self, subgame: BitboardSubgame, player: Color, coord: Coordinate):
+        geometry = self.geometry
+        bit = geometry.bit(coord)
+        point = 1 << bit
+        if subgame.occupied() & point:
+            raise ValueError("Cannot place a stone on an occupied intersection.")
+        subgame.stones[player.value] |= point
+        captured_stones = self.remove_captures(subgame, player, coord)
+        # a single stone that captured a single stone and is left with one liberty is in ko
+        own = subgame.stones[player.value]
+        if (captured_stones.bit_count() == 1 and not geometry.neighbor_masks[bit] & own
+                and (geometry.neighbor_masks[bit] & subgame.empty()).bit_count() == 1):
+            subgame.ko_point = captured_stones.bit_length() - 1
+        else:
+            subgame.ko_point = -1
+
+    def remove_captures(self, subgame: BitboardSubgame, player: Color, coord: Coordinate) -> int:
+        # removes the opponent chains next to coord that have no liberties and returns their stones
+        geometry = self.geometry
+        opponent = WHITE if player == Color.BLACK else BLACK
+        captured_stones = 0
+        for idx, neighbor in enumerate(geometry.neighbor_bits[geometry.bit(coord)]):
+            other = subgame.stones[opponent]
+            if not other >> neighbor & 1:
+                continue
+            if geometry.has_liberties(1 << neighbor, other, subgame.empty()):
+                continue
+            chain = geometry.flood(1 << neighbor, other)
+            subgame.stones[opponent] &= ~chain
+            self.captures[player] += chain.bit_count()
+            captured_stones |= chain
+            for stone in self.quantum_stones:
+                if chain >> geometry.bit(stone) & 1:
+                    #if quantum stone is captured, remove the same colored quantum stone from the other board
+                    other_quantum_stone = next(element for element in self.quantum_stones if element != stone)
+                    if idx == 0:
+                        self.subgames[0].set(other_quantum_stone, Color.EMPTY)
+                    else:
+                        self.subgames[1].set(other_quantum_stone, Color.EMPTY)
+        return captured_stones
+
+    def copy(self) -> "BitboardQuantumGo":
+        game = BitboardQuantumGo.__new__(BitboardQuantumGo)
+        game.geometry = self.geometry
+        game.board_geometry = self.board_geometry
+        game.subgames = [subgame.copy() for subgame in self.subgames]
+        game.quantum_stones = self.quantum_stones.copy()
+        game.komi = self.komi
+        game.round = self.round
+        game.phase = self.phase
+        game.result = self.result
+        game.current_player = self.current_player
+        game.captures = self.captures.copy()
+        game.consecutive_passes = self.consecutive_passes
+        game.move_number = self.move_number
+        return game
+
+    def score(self) -> float:
+        return sum(subgame.area_score() - self.komi for subgame in self.subgames)
+
+    def get_board_state(self):
+        return self.subgames[0].serialize(), self.subgames[1].serialize()
+
+    def get_result(self) -> Optional[str]:
+        return self.result
+
+class BitboardPlayoutPolicy:
+
+    # the move choice of PlayoutPolicy on bitboards: a uniformly chosen point that is empty on both
+    # subgames, is not a ko recapture and neither fills an eye of the player to move nor is suicide on
+    # either subgame. candidates are drawn as random points until few are left, then as the n-th set bit
+    # of the candidate mask
+
+    def __init__(self, game: BitboardQuantumGo):
+        self.game = game
+        self.geometry = game.geometry
+
+    def select_action(self):
+        game = self.game
+        geometry = self.geometry
+        first, second = game.subgames
+        color = game.current_player.value
+
+        candidates = geometry.board_mask & ~(first.occupied() | second.occupied())
+        for subgame in game.subgames:
+            if subgame.ko_point >= 0:
+                candidates &= ~(1 << subgame.ko_point)
+
+        bits = geometry.bits
+        count = candidates.bit_count()
+        while count > 0:
+            if count * 8 >= len(bits):
+                # a random point is a candidate often enough while the board is fairly empty
+                bit = bits[int(random.random() * len(bits))]
+                if not candidates >> bit & 1:
+                    continue
+            else:
+                bit = nth_bit(candidates, int(random.random() * count))
+            if self.is_playable(bit, color):
+                return self.action(bit)
+            # take the rejected point out of the candidates, so every candidate is tried at most once
+            count -= 1
+            candidates ^= 1 << bit
+
+        return game.board_geometry.pass_action
+
+    def action(self, bit):
+        x, y = self.geometry.coord(bit)
+        return self.geometry.height * x + y
+
+    def is_playable(self, bit, color):
+        game = self.game
+        first, second = game.subgames
+
+        if game.round < 2:
+            # quantum stones are only put on the boards after the second one is played
+            return self.geometry.coord(bit) not in game.quantum_stones
+
+        return not (self.is_eye(first, bit, color) or self.is_eye(second, bit, color)
+                    or self.is_suicide(first, bit, color) or self.is_suicide(second, bit, color))
+
+    def is_eye(self, subgame, bit, color):
+        return not self.geometry.neighbor_masks[bit] & ~subgame.stones[color]
+
+    def is_suicide(self, subgame, bit, color):
+        geometry = self.geometry
+        neighbors = geometry.neighbor_masks[bit]
+        empty = subgame.empty()
+        if neighbors & empty:
+            return False
+        # the liberties left once the stone is played
+        liberties = empty & ~(1 << bit)
+        own = subgame.stones[color]
+        if neighbors & own and geometry.has_liberties(neighbors & own, own, liberties):
+            return False
+        other = subgame.stones[BLACK + WHITE - color]
+        for neighbor in geometry.neighbor_bits[bit]:
+            # the move captures this chain
+            if other >> neighbor & 1 and not geometry.has_liberties(1 << neighbor, other, liberties):
+                return False
+        return True
+
+def simulate(prev_board_state, game=None, limits=None):
+
+    # playout.simulate on bitboards. game is an optional BitboardQuantumGo position reached by the first
+    # moves of prev_board_state, which the playout is free to change
+    total_moves = len(prev_board_state)
+
+    if game is None:
+        game = BitboardQuantumGo()
+
+    if total_moves > 0 and prev_board_state[-1] == game.board_geometry.resign_action:
+        return 'B' if total_moves % 2 == 0 else 'W'
+
+    for action in prev_board_state[game.move_number:]:
+        game.play_action(action)
+
+    if limits is None:
+        limits = PlayoutLimits()
+
+    policy = BitboardPlayoutPolicy(game)
+    first, second = game.subgames
+    max_moves = limits.get_max_moves(game.geometry.width, game.geometry.height)
+    captures = game.captures
+    pass_action = game.board_geometry.pass_action
+    ko_moves = 0
+
+    while game.get_result() is None:
+
+        if game.move_number < max_moves and ko_moves < MAX_KO_MOVES:
+            action = policy.select_action()
+        else:
+            action = pass_action
+
+        game.play_action(action)
+
+        if action == pass_action or first.ko_point >= 0 or second.ko_point >= 0:
+            ko_moves += 1
+        else:
+            ko_moves = 0
+
+        if action != pass_action:
+            mercy_result = limits.get_mercy_result(captures[Color.BLACK], captures[Color.WHITE])
+            if mercy_result is not None:
+                return mercy_result
+
+    return game.get_result()
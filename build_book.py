@@ -0,0 +1,87 @@
+import argparse
+import multiprocessing
+import random
+import shlex
+
+from engine import arg_parser, make_engine
+from geometry import make_geometry
+from playout import game_is_over
+from opening_book import write_book
+
+# builds an opening book offline: every position of the first plies is searched with deep settings, its
+# best move goes into the book and its most searched moves lead to the positions of the next ply
+
+def book_arg_parser(argv=None):
+    parser = argparse.ArgumentParser(description="Build an opening book from deep searches of the first moves")
+    parser.add_argument('--engine', default='--playouts 20000', help="Options of the engine as given to main.py, used for every search")
+    parser.add_argument('--depth', type=int, default=3, help="Number of plies from the empty board that are searched")
+    parser.add_argument('--width', type=int, default=3, help="Most searched moves of every position that are followed to the next ply")
+    parser.add_argument('--processes', type=int, default=1, help="Number of positions searched at the same time")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed, position i of a ply is searched with seed + i")
+    parser.add_argument('--output', default='opening-book.bin', help="File the book is written to")
+    args = parser.parse_args(argv)
+    if args.processes > 1 and arg_parser(shlex.split(args.engine)).workers > 1:
+        parser.error("--processes and engines with --workers cannot be combined")
+    return args
+
+def search_position(job):
+
+    # searches one position in a worker process. returns its hash and its moves with the playouts and
+    # wins of each, the most searched first
+    index, options, board_state, seed = job
+    random.seed(seed + index)
+
+    args = arg_parser(shlex.split(options))
+    args.seed = None
+    engine = make_engine(args)
+    root = engine.create_root(board_state)
+    root.create_children(root.get_board_state(), root.get_action_space(), root)
+
+    try:
+        engine.search(root)
+    finally:
+        engine.close()
+
+    children = sorted(root.get_children(), key=lambda child: -child.get_games_played())
+    return root.get_game().get_hash(), [(child.get_next_move(), child.get_games_played(), child.get_games_won()) for child in children]
+
+def build_book(options, depth, width, processes, seed):
+
+    # position hash -> (move, playouts) of every searched position
+    geometry = make_geometry(arg_parser(shlex.split(options)).size)
+    entries = {}
+    positions = [[]]
+
+    for ply in range(depth):
+        jobs = [(index, options, board_state, seed) for index, board_state in enumerate(positions)]
+        print(f"Ply {ply + 1}: searching {len(jobs)} positions")
+
+        if processes > 1:
+            with multiprocessing.Pool(processes) as pool:
+                results = pool.map(search_position, jobs, chunksize=1)
+        else:
+            results = [search_position(job) for job in jobs]
+
+        next_positions = []
+        for board_state, (position_hash, moves) in zip(positions, results):
+            move, playouts, _ = moves[0]
+            # a position reached by two move orders keeps its deeper search
+            if position_hash not in entries or entries[position_hash][1] < playouts:
+                entries[position_hash] = (move, playouts)
+            for move, _, _ in moves[:width]:
+                next_board_state = board_state + [move]
+                if not game_is_over(next_board_state, geometry):
+                    next_positions.append(next_board_state)
+        positions = next_positions
+
+    return geometry.width, entries
+
+def main():
+
+    args = book_arg_parser()
+    size, entries = build_book(args.engine, args.depth, args.width, args.processes, args.seed)
+    write_book(args.output, size, entries)
+    print(f"Wrote {len(entries)} positions to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,103 +1,541 @@
+import math
 import random
-from action_space import action_map_19x19
-from web_board import Board
-from web_board import Player
 import time
 
-#from concurrent.futures import ThreadPoolExecutor
-#from threading import Lock
-
-import copy
-
+from geometry import make_geometry
 from local_simulator import LocalSimulator
-from local_simulator import LocalSimulatorWithGUI
+from playout import simulate, game_is_over, PlayoutLimits
+from rollout_pool import RolloutPool, LocalRollouts
+from transposition import TranspositionEntry, TranspositionTable
+from profiling import PhaseTimer, profile_call
+from opening_book import OpeningBook
+from transport import URL_PRODUCTION
 
 import argparse
 
-def arg_parser():
+# when playing on a game clock, the time for a move is the time left divided by at least this many moves
+MIN_MOVES_TO_GO = 20
+# seconds of the game clock that are never spent on search, to cover the browser and network delay
+CLOCK_SAFETY_MARGIN = 2.0
+# leaves selected per worker before the playouts of a tree parallel batch are sent out
+TREE_PARALLEL_BATCH = 16
+# seconds between checks for the opponent's move while pondering, short so the reply is seen soon after
+# it is played
+PONDER_INTERVAL = 0.25
+# file the cProfile stats of the move chosen with --profile-move are written to
+PROFILE_PATH = "profile-move-{}.prof"
+
+def arg_parser(argv=None):
     parser = argparse.ArgumentParser(description="Resimulate a child node a certain number of times")
     parser.add_argument('-l', type=int, default=3, help="Number of loops")
-    args = parser.parse_args()
-    return args.l
+    parser.add_argument('--policy', choices=['uct', 'flat'], default='uct', help="Tree policy: uct descends the tree with UCB1, flat simulates every child of the root once per loop")
+    parser.add_argument('-c', type=float, default=math.sqrt(2), help="UCB1 exploration constant")
+    parser.add_argument('--time-per-move', type=float, default=None, help="Seconds to search each move, replaces the -l budget")
+    parser.add_argument('--playouts', type=int, default=None, help="Number of playouts per move, replaces the -l budget")
+    parser.add_argument('--game-time', type=float, default=None, help="Total seconds on the engine's game clock, spread over the remaining moves")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes running playouts")
+    parser.add_argument('--parallel', choices=['rollout', 'root', 'tree'], default='rollout', help="How the workers are used: rollout runs the playouts of expanded children, root searches an independent tree per worker, tree shares one tree using virtual loss")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed, makes searches with a playout budget repeatable")
+    parser.add_argument('--tt-size', type=int, default=100000, help="Maximum number of positions in the transposition table, 0 disables it")
+    parser.add_argument('--tt-eviction', choices=['lru', 'fifo', 'visits'], default='lru', help="Which positions are dropped when the transposition table is full")
+    parser.add_argument('--simulator', choices=['python', 'numpy', 'bitboard'], default='python', help="Playout simulator: python plays one game at a time, numpy plays a whole batch of playouts in lockstep but is slower than python at the batch sizes of a search, bitboard plays on big-int bitboards")
+    parser.add_argument('--ponder', action='store_true', help="Keep searching while waiting for the opponent's move")
+    parser.add_argument('--playout-moves', type=int, default=None, help="Game length at which a playout stops and is scored, by default 3 moves per point of the board")
+    parser.add_argument('--mercy', type=int, default=None, help="Capture lead that wins a playout at once, off by default")
+    parser.add_argument('--no-resign', dest='resign', action='store_false', help="Never resign and leave resignation out of the search tree")
+    parser.add_argument('--profile', action='store_true', help="Time every phase of the search and print the times after each move")
+    parser.add_argument('--transport', choices=['selenium', 'http'], default='selenium', help="How the engine reaches the game server: selenium drives the website in a headless Chrome, http calls the server's API directly")
+    parser.add_argument('--server-url', default=URL_PRODUCTION, help="URL of the game server for either transport, e.g. a local test server")
+    parser.add_argument('--size', type=int, default=19, help="Width and height of the board, the website's board can be played on in sizes 5, 9 and 19")
+    parser.add_argument('--book', default=None, help="Opening book written by build_book.py, its moves are played without a search")
+    parser.add_argument('--profile-move', type=int, default=None, help="Run the search of this move of the engine (1 is the first) under cProfile and save the stats")
+    args = parser.parse_args(argv)
+    return args
+
+def make_engine(args):
+    return MCTS(args.l, args.policy, args.c, args.time_per_move, args.playouts, args.game_time, args.workers, args.parallel, args.seed, args.tt_size, args.tt_eviction, args.ponder, args.simulator, args.playout_moves, args.mercy, args.resign, args.profile, args.profile_move, args.size, args.book)
 
 #monte carlo tree search
 class MCTS:
 
-    def __init__(self):
-        pass
-
-    def run(self):
-        board = Board()
-        board_driver = board.get_driver()
-
-        board.login()
-        board.create_game()
-
-        player_black = Player('black', board_driver)
-        player_black.take_seat()
-        
-        parent = Node([], action_map_19x19.copy(), None, 0, 0, None)
+    def __init__(self, num_loops=3, policy='uct', exploration=math.sqrt(2), time_per_move=None, playouts=None, game_time=None, workers=1, parallel='rollout', seed=None, tt_size=100000, tt_eviction='lru', ponder=False, simulator='python', playout_moves=None, mercy=None, resign=True, profile=False, profile_move=None, size=19, book=None):
+        self.num_loops = num_loops
+        self.policy = policy
+        self.exploration = exploration
+        self.time_per_move = time_per_move
+        self.playouts = playouts
+        self.time_left = game_time
+        self.workers = workers
+        self.parallel = parallel
+        self.rollout_pool = None
+        self.tt_size = tt_size
+        self.tt_eviction = tt_eviction
+        self.pondering = ponder
+        self.simulator = simulator
+        self.playout_moves = playout_moves
+        self.mercy = mercy
+        self.playout_limits = PlayoutLimits(playout_moves, mercy)
+        self.resign = resign
+        self.size = size
+        self.geometry = make_geometry(size)
+        # None unless profiling, every timed phase checks for it so the search pays nothing otherwise
+        self.timer = PhaseTimer() if profile else None
+        self.profile_move = profile_move
+        # kept across moves, so positions searched for an earlier move start with their statistics
+        self.transposition_table = TranspositionTable(tt_size, tt_eviction) if tt_size > 0 else None
+        # memory mapped, see opening_book.py
+        self.book = None if book is None else OpeningBook(book)
+        if self.book is not None and self.book.get_size() != size:
+            self.book.close()
+            raise ValueError(f"The opening book {book} is for {self.book.get_size()}x{self.book.get_size()} games")
+
+        if seed is not None:
+            random.seed(seed)
+
+    def get_rollout_pool(self):
+
+        # worker processes are only started once a search needs them
+        if self.workers > 1 and self.rollout_pool is None:
+            self.rollout_pool = RolloutPool(self.workers, self.simulator, self.playout_limits, self.size)
+        elif self.simulator != 'python' and self.rollout_pool is None:
+            # the other simulators get whole batches of playouts even without worker processes
+            self.rollout_pool = LocalRollouts(self.simulator, self.playout_limits, self.size)
+        return self.rollout_pool
+
+    def close(self):
+
+        if self.rollout_pool is not None:
+            self.rollout_pool.close()
+            self.rollout_pool = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def get_move_time(self, root):
+
+        move_time = self.time_per_move
+
+        if self.time_left is not None:
+            # about half of the remaining points will be played by the engine
+            moves_to_go = max(MIN_MOVES_TO_GO, len(root.get_children()) // 2)
+            clock_time = max(0, self.time_left - CLOCK_SAFETY_MARGIN) / moves_to_go
+            move_time = clock_time if move_time is None else min(move_time, clock_time)
+
+        return move_time
+
+    def update_clock(self, time_spent):
+
+        if self.time_left is not None:
+            self.time_left -= time_spent
+
+    def search(self, root):
+
+        move_time = self.get_move_time(root)
+        deadline = None if move_time is None else time.monotonic() + move_time
+
+        if self.playouts is not None:
+            max_playouts = self.playouts
+        elif deadline is not None:
+            max_playouts = None
+        else:
+            # same number of playouts as the flat policy: one per root child per loop
+            max_playouts = self.num_loops * len(root.get_children())
+
+        # however little time is left, every root child without a playout gets one before the deadline is
+        # looked at, so the move is never chosen among children that were not searched
+        min_playouts = sum(1 for child in root.get_children() if child.get_games_played() == 0)
+
+        return self.search_until(root, deadline, max_playouts, min_playouts)
+
+    def ponder(self, root):
+
+        # searches below the engine's last move on the opponent's time. the slices are short so the
+        # reply is noticed quickly, and the playouts stay in the tree for the next search
+        if not root.get_children():
+            root.create_children(root.get_board_state(), root.get_action_space(), root)
+
+        return self.search_until(root, time.monotonic() + PONDER_INTERVAL, None)
+
+    def set_root_game(self, root):
+
+        if root.get_game() is None:
+            game = LocalSimulator(size=self.size)
+            game.play_moves(root.get_board_state())
+            root.set_game(game.game)
+
+    def get_book_move(self, root):
+
+        # the book's move for the root's position, None without a book, for a position it does not have or
+        # for a move the root's action space no longer allows
+        if self.book is None:
+            return None
+
+        self.set_root_game(root)
+        move = self.book.get_move(root.get_game().get_hash())
+        if move is None or not any(child.get_next_move() == move for child in root.get_children()):
+            return None
+        return move
+
+    def search_until(self, root, deadline, max_playouts, min_playouts=0):
+
+        self.set_root_game(root)
+
+        rollout_pool = self.get_rollout_pool()
+
+        if rollout_pool is not None and self.parallel == 'root':
+            return self.search_root_parallel(root, rollout_pool, deadline, max_playouts, min_playouts)
+        return self.search_tree(root, rollout_pool, deadline, max_playouts, min_playouts)
+
+    def link_transposition(self, node, game=None):
+
+        # makes the node share the statistics of every other node that reached the same position. returns
+        # the node's position so a playout can start from it. resignations do not change the position, so
+        # terminal nodes are never shared
+        if self.transposition_table is None or node.get_transposition() is not None or node.is_terminal(self.geometry):
+            return game
+
+        if game is None:
+            game = node.get_position()
+
+        position_hash = game.get_hash()
+        entry = self.transposition_table.get(position_hash)
+
+        if entry is None:
+            entry = TranspositionEntry(node.get_games_played(), node.get_games_won())
+            self.transposition_table.put(position_hash, entry)
+        else:
+            entry.games_played += node.get_games_played()
+            entry.games_won += node.get_games_won()
+
+        node.set_transposition(entry)
+        return game
+
+    def link_children(self, node, children):
+
+        # links the children of node like link_transposition. a child's position is node's position with
+        # one more move, so node's position is replayed once and every child plays its move on a copy
+        if self.transposition_table is None:
+            return
+
+        position = None
+
+        for child in children:
+            if child.get_transposition() is not None or child.is_terminal(self.geometry):
+                continue
+            if position is None:
+                position = node.get_position()
+            game = LocalSimulator(position.copy())
+            game.play_move(child.get_next_move())
+            self.link_transposition(child, game.game)
+
+    def has_budget(self, num_playouts, deadline, max_playouts, min_playouts=0):
+
+        # min_playouts are run even after the deadline, but never more than max_playouts
+        if max_playouts is not None and num_playouts >= max_playouts:
+            return False
+        if num_playouts < min_playouts:
+            return True
+        return deadline is None or time.monotonic() < deadline
+
+    def search_tree(self, root, rollout_pool, deadline, max_playouts, min_playouts=0):
+
+        num_playouts = 0
+
+        if self.policy == 'flat':
+            # every child needs at least one playout before win ratios can be compared
+            while num_playouts == 0 or self.has_budget(num_playouts, deadline, max_playouts, min_playouts):
+                root.simulate_children_and_update(rollout_pool, self.playout_limits, self.timer)
+                num_playouts += len(root.get_children())
+            return num_playouts
+
+        if rollout_pool is not None and self.parallel == 'tree':
+            # several leaves are selected before any result comes back. a virtual loss on every node of a
+            # selected path makes the following selections in the batch prefer other paths
+            batch_size = self.workers * TREE_PARALLEL_BATCH
+            while self.has_budget(num_playouts, deadline, max_playouts, min_playouts):
+                if max_playouts is not None:
+                    batch_size = min(batch_size, max_playouts - num_playouts)
+                leaves = []
+                for i in range(batch_size):
+                    node = self.select_leaf(root)
+                    self.link_transposition(node)
+                    node.add_virtual_loss()
+                    leaves.append(node)
+                if self.timer is not None:
+                    start = time.perf_counter()
+                results = rollout_pool.run([leaf.get_board_state() for leaf in leaves], root.get_start_game())
+                if self.timer is not None:
+                    self.timer.add('playouts', start)
+                    start = time.perf_counter()
+                for leaf, result in zip(leaves, results):
+                    leaf.backpropagate(result, virtual_loss=1)
+                if self.timer is not None:
+                    self.timer.add('backpropagation', start)
+                num_playouts += len(leaves)
+            return num_playouts
+
+        if rollout_pool is not None:
+            # with worker processes a leaf is expanded with all of its children at once, and every child
+            # gets one playout in the same batch
+            timer = self.timer
+            while self.has_budget(num_playouts, deadline, max_playouts, min_playouts):
+                if timer is not None:
+                    start = time.perf_counter()
+                node = root
+                while node.get_children() and not node.has_unvisited_children():
+                    node = node.select_child(self.exploration)
+                if timer is not None:
+                    timer.add('selection', start)
+                if not node.get_children() and not node.is_terminal(self.geometry):
+                    if timer is not None:
+                        start = time.perf_counter()
+                    node.create_children(node.get_board_state(), node.get_action_space(), node)
+                    if timer is not None:
+                        timer.add('expansion', start)
+                if node.get_children():
+                    # only the children without a playout are simulated, and no more of them than the budget
+                    # has left. the rest are simulated when the node is selected again
+                    children = [child for child in node.get_children() if child.get_games_played() == 0]
+                    if max_playouts is not None and len(children) > max_playouts - num_playouts:
+                        children = random.sample(children, max_playouts - num_playouts)
+                    if timer is not None:
+                        start = time.perf_counter()
+                    self.link_children(node, children)
+                    if timer is not None:
+                        timer.add('transposition', start)
+                    node.simulate_children_and_update(rollout_pool, self.playout_limits, timer, children)
+                    num_playouts += len(children)
+                else:
+                    node.backpropagate(node.simulate(node.get_board_state(), None, self.playout_limits))
+                    num_playouts += 1
+            return num_playouts
+
+        timer = self.timer
+        while self.has_budget(num_playouts, deadline, max_playouts, min_playouts):
+            node = self.select_leaf(root)
+            if timer is not None:
+                start = time.perf_counter()
+            game = self.link_transposition(node)
+            if timer is not None:
+                timer.add('transposition', start)
+            # simulation
+            result = node.simulate(node.get_board_state(), game, self.playout_limits, timer)
+            # backpropagation
+            if timer is not None:
+                start = time.perf_counter()
+            node.backpropagate(result)
+            if timer is not None:
+                timer.add('backpropagation', start)
+            num_playouts += 1
+
+        return num_playouts
+
+    def select_leaf(self, root):
+
+        timer = self.timer
+        if timer is not None:
+            start = time.perf_counter()
+        node = root
+        # selection
+        while node.get_children():
+            node = node.select_child(self.exploration)
+        if timer is not None:
+            timer.add('selection', start)
+        # expansion
+        if not node.is_terminal(self.geometry) and node.get_games_played() > 0:
+            if timer is not None:
+                start = time.perf_counter()
+            node.create_children(node.get_board_state(), node.get_action_space(), node)
+            if node.get_children():
+                node = node.select_child(self.exploration)
+            if timer is not None:
+                timer.add('expansion', start)
+        return node
+
+    def search_root_parallel(self, root, rollout_pool, deadline, max_playouts, min_playouts=0):
+
+        # every worker searches its own tree from the root, then the statistics of the root children are
+        # added up. the seeds come from this process so the search is repeatable with --seed
+        move_time = None if deadline is None else max(0, deadline - time.monotonic())
+        tree_playouts = None if max_playouts is None else -(-max_playouts // self.workers)
+        tree_min_playouts = -(-min_playouts // self.workers)
+        settings = {'num_loops': self.num_loops, 'policy': self.policy, 'exploration': self.exploration, 'tt_size': self.tt_size, 'tt_eviction': self.tt_eviction, 'simulator': self.simulator, 'playout_moves': self.playout_moves, 'mercy': self.mercy, 'size': self.size}
+        jobs = [(root.get_board_state(), root.get_action_space(), root.get_game(), settings, random.getrandbits(32), move_time, tree_playouts, tree_min_playouts) for i in range(self.workers)]
+
+        children = {child.get_next_move(): child for child in root.get_children()}
+        num_playouts = 0
+
+        if self.timer is not None:
+            start = time.perf_counter()
+        tree_results = rollout_pool.map(search_root_tree, jobs)
+        if self.timer is not None:
+            self.timer.add('root parallel trees', start)
+
+        for tree_statistics in tree_results:
+            for move, games_played, games_won in tree_statistics:
+                child = children[move]
+                child.set_games_played(child.get_games_played() + games_played)
+                child.set_games_won(child.get_games_won() + games_won)
+                num_playouts += games_played
+
+        root.set_games_played(root.get_games_played() + num_playouts)
+        return num_playouts
+
+    def get_best_child(self, root):
+
+        if self.policy == 'flat':
+            return root.get_best_child()
+        best_child = root.get_most_visited_child()
+        if best_child.get_games_played() == 0:
+            # nothing was searched, a move is better than resigning blindly
+            moves = [child for child in root.get_children() if child.get_next_move() != self.geometry.resign_action]
+            if moves:
+                return random.choice(moves)
+        return best_child
+
+    def advance_root(self, root, board_state):
+
+        # the node below root reached by the moves played since root becomes the new root with its
+        # statistics. nothing else references the rest of the old tree once it is detached
+        root_board_state = root.get_board_state()
+
+        if board_state[:len(root_board_state)] != root_board_state:
+            return Node(board_state, root.get_action_space(), None, 0, 0, None)
+
+        node = root
+
+        for move in board_state[len(root_board_state):]:
+            node = next((child for child in node.get_children() if child.get_next_move() == move), None)
+            if node is None:
+                return Node(board_state, root.get_action_space(), None, 0, 0, None)
+
+        game = node.get_position()
+
+        node.set_parent(None)
+        node.set_board_state(list(board_state))
+        node.set_action_space(root.get_action_space())
+        node.set_game(game)
+
+        return node
+
+    def create_root(self, board_state=()):
+
+        # root for the position after board_state, by default the start of a game. the points played so far
+        # are taken out of the action space
+        action_space = self.geometry.action_map.copy()
+        if not self.resign:
+            # playouts never resign, so without the resign children no result comes from a resignation
+            action_space.pop(self.geometry.resign_action)
+        for move in board_state:
+            if move != self.geometry.pass_action:
+                action_space.pop(move, None)
+        return Node(board_state, action_space, None, 0, 0, None)
+
+    def run(self, transport):
+
+        # plays one game as black through transport, see transport.py
+        transport.start()
+
+        geometry = self.geometry
+        parent = self.create_root()
+        engine_moves = 0
 
         while True:
             
-            parent.create_children(parent.get_board_state(), parent.get_action_space(), parent)
-            num_loops = arg_parser()
-            start = time.time()
-            print("Simulating ...")
-            for i in range(num_loops):
-                parent.simulate_children_and_update()
-            end = time.time()
-            print(f"Time taken to simulate {len(parent.get_children())} children {num_loops} times: {end - start:.2f} seconds")
+            turn_start = time.time()
+            if not parent.get_children():
+                parent.create_children(parent.get_board_state(), parent.get_action_space(), parent)
+            else:
+                print(f"Reusing {parent.get_games_played()} playouts from the previous search")
+            engine_moves += 1
+            best_move = self.get_book_move(parent)
+
+            if best_move is not None:
+                print("Book move for engine: Action", best_move)
+            else:
+                start = time.time()
+                print("Simulating ...")
+                if engine_moves == self.profile_move:
+                    num_playouts = profile_call(PROFILE_PATH.format(engine_moves), self.search, parent)
+                else:
+                    num_playouts = self.search(parent)
+                end = time.time()
+                print(f"Time taken to run {num_playouts} playouts from {len(parent.get_children())} children: {end - start:.2f} seconds")
+                if self.timer is not None:
+                    print(self.timer.report())
+                    self.timer.reset()
 
-            best_child = parent.get_best_child()
+                best_child = self.get_best_child(parent)
 
-            best_move = parent.get_best_move(best_child)
+                best_move = parent.get_best_move(best_child)
 
-            print("Best move for engine: Action", best_move)
+                print("Best move for engine: Action", best_move)
 
-            player_black.make_move(best_move)
-            time.sleep(2)
+            transport.play_move(best_move)
+            self.update_clock(time.time() - turn_start)
 
-            if(best_move == 362):
+            # the engine's resignation, or its pass after white's, ends the game
+            if game_is_over(parent.get_board_state() + [best_move], geometry):
                 break
         
-            parent = best_child
+            # pass stays available to both players for the rest of the game
+            if best_move != geometry.pass_action:
+                parent.get_action_space().pop(best_move)
 
-            parent.get_action_space().pop(best_move)
+            # moves in the game once the engine's move is in it, white's reply is the one after them
+            moves_played = len(parent.get_board_state()) + 1
 
-            need_to_select_player = True
+            if self.pondering:
+                # the engine's move becomes the root so the search can go on from it while white thinks
+                parent = self.advance_root(parent, parent.get_board_state() + [best_move])
+                num_pondered = 0
 
             # the move that player white makes is not available to player black.
 
             # FIX: use the board state as the action spaace instead of the sgf data because the game is better represented as the board state instead of the moves in sgf data
-            board_state = board.get_sgf_data()
-
             print("Waiting for player white to make move")
-            while board_state[-1] == best_move:
-                time.sleep(1)
-                board_state = board.get_sgf_data()
+            if self.pondering:
+                # a check does not wait, a failed read is retried at a later check after the feed's backoff
+                board_state = transport.wait_for_moves(moves_played, 0)
+                while len(board_state) <= moves_played:
+                    num_pondered += self.ponder(parent)
+                    board_state = transport.wait_for_moves(moves_played, 0)
+                print(f"Pondered {num_pondered} playouts while waiting")
+            else:
+                board_state = transport.wait_for_moves(moves_played)
             
-            #issue #8
-            if board_state[-1] == 361:
+            if board_state[-1] == geometry.pass_action:
                 print("Player white passed")
-                player_black.select_player()
+                transport.opponent_passed()
+
+            # the reply can be on a point freed by a capture, which is no longer in the action space
+            if board_state[-1] != geometry.pass_action:
+                parent.get_action_space().pop(board_state[-1], None)
 
-            parent.get_action_space().pop(board_state[-1])
+            if game_is_over(board_state, geometry):
+                break
 
-            parent.set_board_state(board_state)
+            # search again from the position after white's reply, keeping what was found below it
+            parent = self.advance_root(parent, board_state)
             
             
+        self.close()
+        transport.close()
         print("Game Over")
 
 class Node:
 
+    # nodes only hold their own move, the moves leading to them are rebuilt from the parents on demand.
+    # board_state and action_space are only set on the root
+    __slots__ = ('board_state', 'action_space', 'parent', 'games_played', 'games_won', 'next_move', 'children', 'game', 'transposition')
+
     def __init__(self, board_state, action_space, parent, games_played, games_won, next_move):
 
-        self.board_state = copy.copy(board_state)
+        self.board_state = None if board_state is None else list(board_state)
 
         self.action_space = action_space
 
-        self.parent = copy.copy(parent)
+        self.parent = parent
 
         self.games_played = games_played
 
@@ -105,15 +543,37 @@ class Node:
 
         self.next_move = next_move
 
-        self.children = []
+        # leaves share the empty tuple until they are expanded
+        self.children = ()
+
+        # QuantumGo position after board_state. only kept for the root, every playout starts from a copy of it
+        self.game = None
+
+        # statistics shared with other nodes reaching the same position, they replace games_played and
+        # games_won once the node is in the transposition table
+        self.transposition = None
 
     def get_board_state(self):
-            
-        return self.board_state
+
+        # a new list with the moves from the closest node that stores them down to this one
+        moves = []
+        node = self
+
+        while node.board_state is None:
+            moves.append(node.next_move)
+            node = node.parent
+
+        moves.reverse()
+        return node.board_state + moves
     
     def get_action_space(self):
 
-        return self.action_space
+        node = self
+
+        while node.action_space is None:
+            node = node.parent
+
+        return node.action_space
 
     def get_parent(self):
             
@@ -125,15 +585,33 @@ class Node:
 
     def get_games_played(self):
 
+        if self.transposition is not None:
+            return self.transposition.games_played
         return self.games_played
     
     def get_games_won(self):
 
+        if self.transposition is not None:
+            return self.transposition.games_won
         return self.games_won
     
     def get_next_move(self):
         
         return self.next_move
+
+    def get_last_move(self):
+
+        if self.board_state is None:
+            return self.next_move
+        return self.board_state[-1] if self.board_state else None
+
+    def get_game(self):
+
+        return self.game
+
+    def get_transposition(self):
+
+        return self.transposition
     
     def set_board_state(self, board_state):
 
@@ -149,106 +627,174 @@ class Node:
 
     def set_child(self, child):
 
+        if not self.children:
+            self.children = []
         self.children.append(child)
 
     def set_games_played(self, games_played):
             
-        self.games_played = games_played
+        if self.transposition is not None:
+            self.transposition.games_played = games_played
+        else:
+            self.games_played = games_played
     
     def set_games_won(self, games_won):
 
-        self.games_won = games_won
+        if self.transposition is not None:
+            self.transposition.games_won = games_won
+        else:
+            self.games_won = games_won
     
     def set_next_move(self, next_move):
 
         self.next_move = next_move
 
-    def create_children(self, board_state, action_space, parent):
+    def set_game(self, game):
 
-        for key, value in action_space.items():
+        self.game = game
 
-            child = Node(board_state, action_space, parent, 0, 0, key)
-            parent.set_child(child)
-            child.set_parent(parent)
+    def set_transposition(self, transposition):
 
-    def simulate_children_and_update(self):
+        self.transposition = transposition
 
-        def simulate_child(child):
+    def get_start_game(self):
 
-            child_board_state = child.get_board_state()
-            child_next_move = child.get_next_move()
+        # copy of the closest position cached on this node or above it, None if there is none
+        node = self
 
-            #if the child is resimulated then the board state does not need to be updated since the same board state will be played again
-            if not child_next_move in child_board_state:
+        while node is not None:
+            if node.get_game() is not None:
+                return node.get_game().copy()
+            node = node.get_parent()
 
-                child_board_state.append(child_next_move)
+        return None
 
-                child.set_board_state(child_board_state)
+    def get_position(self):
 
-            child_result = child.simulate(child_board_state.copy())
-        
-            if child_result == 'B':
-                child.set_games_won(child.get_games_won() + 1)
-            
-            child.set_games_played(child.get_games_played() + 1)
+        # the QuantumGo position after board_state, replayed from the closest cached position
+        game = LocalSimulator(self.get_start_game())
+        game.play_moves(self.get_board_state()[game.game.move_number:])
 
+        return game.game
 
-        for child in self.children:
-            simulate_child(child)
-        
+    def create_children(self, board_state, action_space, parent):
 
-    def simulate(self, prev_board_state):
+        # points already played further up the tree are not available again, but pass always is
+        # except during quantum stone placement
+        played_moves = set(board_state)
+        children = []
 
-        current_game_moves = []
+        for key, action in action_space.items():
 
-        temp_action_space = action_map_19x19.copy()
+            if action == 'pass':
+                if len(board_state) < 2:
+                    continue
+            elif key in played_moves:
+                continue
 
-        current_game_moves = prev_board_state
+            children.append(Node(None, None, parent, 0, 0, key))
 
-        total_moves = len(current_game_moves)
+        parent.children = children
 
-        index = 0
+    def is_terminal(self, geometry):
 
-        for move in current_game_moves:
-            if (move == 362):
-                return 'B' if total_moves % 2 == 0 else 'W'
-            else:
-                temp_action_space.pop(move)
+        if self.board_state is not None:
+            return game_is_over(self.board_state, geometry)
+        if self.next_move == geometry.resign_action:
+            return True
+        return self.next_move == geometry.pass_action and self.parent.get_last_move() == geometry.pass_action
 
-        while True:
+    def get_player(self):
 
-            random_action = random.choice(list(temp_action_space.keys()))
+        # the player who played next_move to reach this node
+        return 'B' if len(self.get_board_state()) % 2 == 1 else 'W'
 
-            #cannot pass during quantum stone placment phase
-            while total_moves <= 2 and random_action == 361:
-                random_action = random.choice(list(temp_action_space.keys()))
+    def select_child(self, exploration):
 
-            if(random_action == 362):
-                #the game result if one player resigns
-                return 'B' if total_moves % 2 == 0 else 'W'
+        # UCB1: unvisited children are always tried first
+        unvisited = [child for child in self.children if child.get_games_played() == 0]
+        if unvisited:
+            return random.choice(unvisited)
 
-            if(random_action == 361 and current_game_moves[-1] == 361):
-                current_game_moves.append(random_action)
-                game = LocalSimulator()
-                game.play_moves(current_game_moves)
-                game_result = game.get_result()
+        log_games_played = math.log(self.get_games_played())
+        max_score = -1
+        best_children = []
 
-                #need next two lines if running with GUI
-                #game.display_board()
-                #game.root.destroy()
-                
-                return game_result
-            
-            # we dont want to remove the 'pass' action from the action space
-            if not (random_action == 361):
-                temp_action_space.pop(random_action)
-            
-            current_game_moves.append(random_action)
+        for child in self.children:
 
-            total_moves += 1
-            index +=1
+            score = child.get_games_won() / child.get_games_played() + exploration * math.sqrt(log_games_played / child.get_games_played())
 
+            if score > max_score:
+                max_score = score
+                best_children = [child]
+            elif score == max_score:
+                best_children.append(child)
+
+        return random.choice(best_children)
+
+    def add_virtual_loss(self):
+
+        # counts a playout that has not finished yet as a loss for every node on the path
+        node = self
+
+        while node is not None:
+            node.set_games_played(node.get_games_played() + 1)
+            node = node.get_parent()
+
+    def backpropagate(self, result, virtual_loss=0):
+
+        winner = get_winner(result)
+        player = self.get_player()
+        node = self
+
+        # players alternate on the way up, so the path is only measured once
+        while node is not None:
+            node.set_games_played(node.get_games_played() + 1 - virtual_loss)
+            if winner == player:
+                node.set_games_won(node.get_games_won() + 1)
+            player = 'W' if player == 'B' else 'B'
+            node = node.get_parent()
+
+    def has_unvisited_children(self):
+
+        return any(child.get_games_played() == 0 for child in self.children)
+
+    def simulate_children_and_update(self, rollout_pool=None, limits=None, timer=None, children=None):
+
+        # one playout for each of children, all of the node's children by default
+        if children is None:
+            children = self.children
+
+        if rollout_pool is not None:
+            if timer is not None:
+                start = time.perf_counter()
+            results = rollout_pool.run([child.get_board_state() for child in children], self.get_start_game())
+            if timer is not None:
+                timer.add('playouts', start)
+                start = time.perf_counter()
+            for child, child_result in zip(children, results):
+                child.backpropagate(child_result)
+            if timer is not None:
+                timer.add('backpropagation', start)
+            return
+
+        for child in children:
+            result = child.simulate(child.get_board_state(), None, limits, timer)
+            if timer is not None:
+                start = time.perf_counter()
+            child.backpropagate(result)
+            if timer is not None:
+                timer.add('backpropagation', start)
         
+
+    def simulate(self, prev_board_state, game=None, limits=None, timer=None):
+
+        # game is the node's position when the caller already has it
+        if game is None:
+            game = self.get_start_game()
+
+        return simulate(prev_board_state, game, limits, timer)
+
     def get_best_child(self):
 
         max_ratio = 0
@@ -270,7 +816,44 @@ class Node:
         #exploration vs exploitation - use upper confidence bound instead
         return best_child if best_children == [] else random.choice(best_children)
 
+    def get_most_visited_child(self):
+
+        # ties in visits, common after a short search, go to the child with more wins
+        best = max((child.get_games_played(), child.get_games_won()) for child in self.children)
+
+        return random.choice([child for child in self.children if (child.get_games_played(), child.get_games_won()) == best])
+
     def get_best_move(self, child):
 
         return child.get_next_move()
+
+
+def search_root_tree(job):
+
+    # runs in a worker process for root parallel search
+    board_state, action_space, game, settings, seed, move_time, max_playouts, min_playouts = job
+    random.seed(seed)
+
+    mcts = MCTS(**settings)
+    root = Node(board_state, action_space, None, 0, 0, None)
+    root.set_game(game)
+    root.create_children(root.get_board_state(), root.get_action_space(), root)
+    deadline = None if move_time is None else time.monotonic() + move_time
+    # the worker runs its tree's playouts itself, in batches when the simulator is not the python one
+    try:
+        mcts.search_tree(root, mcts.get_rollout_pool(), deadline, max_playouts, min_playouts)
+    finally:
+        mcts.close()
+
+    return [(child.get_next_move(), child.get_games_played(), child.get_games_won()) for child in root.get_children()]
+
+
+def get_winner(result):
+
+    # results are 'B'/'W' from a resignation in a playout, 'B+M'/'W+M' from the mercy rule or 'B+R',
+    # 'W+6.5', 'Tie' from the simulator
+    if result is None or result == 'Tie':
+        return None
+    return result[0]
+
     
\ No newline at end of file
@@ -0,0 +1,85 @@
+from types import MappingProxyType
+
+from offset_moves import OFFSETS
+
+# everything the engine, the simulators and the web layer need to know about a board size. the tables are
+# tuples indexed by action, built once per size and never changed, so every user can index them directly.
+# actions are height * x + y for the points, then pass and resign, as in action_space.make_action_map
+
+SGF_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+_geometries = {}
+
+def make_geometry(width, height=None):
+    # square boards unless a height is given
+    key = (width, width if height is None else height)
+    if key not in _geometries:
+        _geometries[key] = BoardGeometry(*key)
+    return _geometries[key]
+
+class BoardGeometry:
+
+    __slots__ = ('width', 'height', 'points', 'pass_action', 'resign_action', 'moves', 'action_map', 'reverse_action_map',
+                 'neighbors', 'stride', 'padded_points', 'point_actions', 'padded_neighbors', 'sgf_points', 'sgf_actions', 'click_offsets')
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.points = width * height
+        self.pass_action = self.points
+        self.resign_action = self.points + 1
+
+        # the move of every action as QuantumGo plays it: the (x, y) of a point, 'pass' or 'resign'
+        self.moves = tuple(divmod(action, height) for action in range(self.points)) + ('pass', 'resign')
+
+        # the same as action_space.make_action_map, read only. the engine copies it for the action space of a game
+        self.action_map = MappingProxyType({height * x + y: (x, y) for y in range(height) for x in range(width)} | {self.pass_action: 'pass', self.resign_action: 'resign'})
+        self.reverse_action_map = MappingProxyType({move: action for action, move in self.action_map.items()})
+
+        # actions of the points next to every point: left, right, above, below
+        self.neighbors = tuple(tuple(height * nx + ny for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)) if 0 <= nx < width and 0 <= ny < height)
+                               for x, y in self.moves[:self.points])
+
+        # the same board with a one point border on every side, stored row by row, as BadukBoard keeps it. the
+        # padded point of every action, the action of every padded point (None on the border) and the padded
+        # neighbors of every padded point (none for the border)
+        self.stride = width + 2
+        self.padded_points = tuple((y + 1) * self.stride + x + 1 for x, y in self.moves[:self.points])
+        point_actions = [None] * (self.stride * (height + 2))
+        padded_neighbors = [()] * len(point_actions)
+        for action, point in enumerate(self.padded_points):
+            point_actions[point] = action
+            padded_neighbors[point] = tuple(self.padded_points[neighbor] for neighbor in self.neighbors[action])
+        self.point_actions = tuple(point_actions)
+        self.padded_neighbors = tuple(padded_neighbors)
+
+        # SGF letter coordinates of every point and the action of every letter pair
+        if max(width, height) <= len(SGF_LETTERS):
+            self.sgf_points = tuple(SGF_LETTERS[x] + SGF_LETTERS[y] for x, y in self.moves[:self.points])
+        else:
+            self.sgf_points = ()
+        self.sgf_actions = MappingProxyType({letters: action for action, letters in enumerate(self.sgf_points)})
+
+        # pixels from the center of the website's board to every point, empty for sizes it is not measured for
+        offsets = OFFSETS.get(width) if width == height else None
+        self.click_offsets = () if offsets is None else tuple((offsets[x], offsets[y]) for x, y in self.moves[:self.points])
+
+    def __reduce__(self):
+        # positions sent to worker processes carry their geometry, the workers use their own copy of it
+        return make_geometry, (self.width, self.height)
+
+    def get_size(self):
+        return self.width, self.height
+
+    def is_point(self, action):
+        return 0 <= action < self.points
+
+    def get_click_offset(self, action):
+        if not self.click_offsets:
+            raise ValueError(f"The website's board is not measured for {self.width}x{self.height} games")
+        return self.click_offsets[action]
+
+# the sizes the website's board is measured for are built at import
+GEOMETRY_5x5 = make_geometry(5)
+GEOMETRY_9x9 = make_geometry(9)
+GEOMETRY_19x19 = make_geometry(19)
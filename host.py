@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import multiprocessing
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from engine import arg_parser, make_engine
+from local_simulator import LocalSimulator
+from transport import HttpTransport, URL_PRODUCTION, make_session
+
+# plays many games at once from one process. every game is a task on one event loop that waits on the
+# server, and the searches of the games on move share one pool of worker processes
+
+# seconds the host waits for an opponent's move before it leaves the game
+OPPONENT_TIMEOUT = 3600
+
+def host_arg_parser(argv=None):
+    parser = argparse.ArgumentParser(description="Play several games on the game server from one process")
+    parser.add_argument('--engine', default='', help="Options of the engine as given to main.py, e.g. \"--game-time 600\", used in every game")
+    parser.add_argument('--games', type=int, default=1, help="Number of games created")
+    parser.add_argument('--join', nargs='*', default=[], help="Ids of games created by others to play black in")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes searching for the games on move")
+    parser.add_argument('--server-url', default=URL_PRODUCTION, help="URL of the game server")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and arg_parser(shlex.split(args.engine)).workers > 1:
+        parser.error("--workers of the host and of the engine cannot be combined")
+    return args
+
+def search_move(job):
+
+    # one search in a worker process. the worker keeps no tree between moves, so any worker can take
+    # the next move of any game. the time the job waited for a worker since submitted is taken off the
+    # game's clock
+    options, board_state, time_left, submitted = job
+    engine = make_engine(arg_parser(shlex.split(options)))
+    if time_left is not None:
+        engine.time_left = time_left - (time.time() - submitted)
+
+    root = engine.create_root(board_state)
+    root.create_children(root.get_board_state(), root.get_action_space(), root)
+
+    try:
+        move = engine.get_book_move(root)
+        if move is not None:
+            return move, 0
+        num_playouts = engine.search(root)
+        return root.get_best_move(engine.get_best_child(root)), num_playouts
+    finally:
+        engine.close()
+
+class Game:
+
+    # one game of the host: its transport, the referee that follows it and what is left of its clock
+
+    def __init__(self, name, transport, options):
+        self.name = name
+        self.transport = transport
+        self.options = options
+        args = arg_parser(shlex.split(options))
+        self.time_left = args.game_time
+        self.referee = LocalSimulator(size=args.size)
+        self.board_state = []
+
+    def get_result(self):
+        return self.referee.get_result()
+
+    def follow(self, board_state):
+        # plays the moves the referee has not seen yet, False when one of them is illegal
+        for move in board_state[len(self.board_state):]:
+            try:
+                self.referee.play_move(move)
+            except (ValueError, IndexError, TypeError):
+                return False
+            self.board_state.append(move)
+        return True
+
+class BotHost:
+
+    def __init__(self, server_url, workers):
+        self.server_url = server_url
+        self.workers = workers
+        self.session = None
+        self.search_pool = None
+        self.io_pool = None
+
+    async def io(self, function, *args):
+        # the transports block, each call gets a thread so the event loop keeps serving the other games
+        return await asyncio.get_running_loop().run_in_executor(self.io_pool, function, *args)
+
+    async def play(self, game):
+
+        loop = asyncio.get_running_loop()
+
+        while game.get_result() is None:
+            start = time.monotonic()
+            # the game's clock runs from the moment it is on move, so waiting for a worker counts against it
+            move, num_playouts = await loop.run_in_executor(self.search_pool, search_move, (game.options, list(game.board_state), game.time_left, time.time()))
+            await self.io(game.transport.play_move, move)
+            spent = time.monotonic() - start
+            if game.time_left is not None:
+                game.time_left -= spent
+            print(f"{game.name}: played action {move} after {num_playouts} playouts in {spent:.2f} seconds")
+
+            if move == game.referee.game.geometry.resign_action or not game.follow(game.board_state + [move]) or game.get_result() is not None:
+                break
+
+            board_state = await self.io(game.transport.wait_for_moves, len(game.board_state), OPPONENT_TIMEOUT)
+            if len(board_state) <= len(game.board_state):
+                print(f"{game.name}: no move from the opponent in {OPPONENT_TIMEOUT} seconds, leaving the game")
+                break
+            if not game.follow(board_state):
+                print(f"{game.name}: the opponent's move is illegal, leaving the game")
+                break
+
+        print(f"{game.name}: game over, result {game.get_result()}")
+        return game.get_result()
+
+    async def start_game(self, name, options, game_id=None):
+
+        transport = HttpTransport(self.server_url, session=self.session, size=arg_parser(shlex.split(options)).size)
+        try:
+            if game_id is None:
+                await self.io(transport.start)
+            else:
+                await self.io(transport.join, game_id)
+            return await self.play(Game(name, transport, options))
+        finally:
+            transport.close()
+
+    async def run(self, options, games, join):
+
+        num_games = games + len(join)
+        self.session = make_session(max(1, num_games))
+        # the I/O threads are running by the time the first search starts the workers, and forking a
+        # process with threads can deadlock it, so the workers come from a forkserver
+        self.search_pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('forkserver'))
+        self.io_pool = ThreadPoolExecutor(max(1, num_games))
+
+        try:
+            tasks = [self.start_game(f"game {index + 1}", options) for index in range(games)]
+            tasks += [self.start_game(f"game {game_id}", options, game_id) for game_id in join]
+            # a game that fails does not stop the others
+            return await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self.search_pool.shutdown()
+            self.io_pool.shutdown()
+            self.session.close()
+
+def main():
+
+    args = host_arg_parser()
+    host = BotHost(args.server_url, args.workers)
+    results = asyncio.run(host.run(args.engine, args.games, args.join))
+    for index, result in enumerate(results):
+        print(f"Game {index + 1}: {result}")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
+import random
+import time
 import tkinter as tk
 from enum import Enum
 from typing import List, Tuple, Optional
-from action_space import action_map_19x19
+from geometry import make_geometry
 
 class Color(Enum):
     EMPTY = 0
@@ -10,31 +12,239 @@ class Color(Enum):
 
 type Coordinate = tuple[int, int]
 
+EMPTY = Color.EMPTY.value
+BLACK = Color.BLACK.value
+WHITE = Color.WHITE.value
+BORDER = 3
+
+def format_result(score: float) -> str:
+    if score < 0:
+        return f"W+{-score}"
+    elif score > 0:
+        return f"B+{score}"
+    return "Tie"
+
+_zobrist_keys = {}
+
+_state_key_rng = random.Random("quantum go state")
+WHITE_TO_MOVE_KEY = _state_key_rng.getrandbits(64)
+PASS_KEY = _state_key_rng.getrandbits(64)
+
+def make_zobrist_keys(width: int, height: int, index: int) -> List[List[int]]:
+    # random 64 bit keys per color and point, seeded by the board size and index so that every process
+    # hashes positions the same way. index tells apart the two subgames and the quantum stone slots
+    key = (width, height, index)
+    if key not in _zobrist_keys:
+        rng = random.Random(f"{width}x{height}:{index}")
+        size = (width + 2) * (height + 2)
+        _zobrist_keys[key] = [[0] * size] + [[rng.getrandbits(64) for _ in range(size)] for _ in range(2)]
+    return _zobrist_keys[key]
+
 class BadukBoard:
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, index: int = 0):
         self.width = width
         self.height = height
-        self.board = [[Color.EMPTY for _ in range(width)] for _ in range(height)]
+        self.stride = width + 2
+        self.board = bytearray([BORDER]) * (self.stride * (height + 2))
+        for point in self.points():
+            self.board[point] = EMPTY
+        self.neighbor_table = make_geometry(width, height).padded_neighbors
+        # stones of a chain form a circular linked list through next_stone and all point at the chain's
+        # head in chain. liberties and chain_size are kept per head so captures never need a flood fill
+        self.chain = [0] * len(self.board)
+        self.next_stone = [0] * len(self.board)
+        self.chain_size = [0] * len(self.board)
+        self.liberties = {}
+        # empty points in no particular order, with the index of every point in that list, so points can be
+        # added, removed and sampled in O(1)
+        self.empty_points = self.points()
+        self.empty_index = [-1] * len(self.board)
+        for position, point in enumerate(self.empty_points):
+            self.empty_index[point] = position
+        # point of a stone just captured in a ko, it cannot be retaken on the next move. 0 if there is none
+        self.ko_point = 0
+        # zobrist hash of the stones on the board, updated whenever a stone is added or removed
+        self.zobrist_keys = make_zobrist_keys(width, height, index)
+        self.hash = 0
+
+    def point(self, coord: Coordinate) -> int:
+        return (coord[1] + 1) * self.stride + coord[0] + 1
+
+    def coord(self, point: int) -> Coordinate:
+        y, x = divmod(point, self.stride)
+        return (x - 1, y - 1)
+
+    def points(self) -> List[int]:
+        return [(y + 1) * self.stride + x + 1 for y in range(self.height) for x in range(self.width)]
 
     def at(self, coord: Coordinate) -> Color:
-        return self.board[coord[1]][coord[0]]
+        return Color(self.board[(coord[1] + 1) * self.stride + coord[0] + 1])
 
     def set(self, coord: Coordinate, color: Color):
-        self.board[coord[1]][coord[0]] = color
+        point = (coord[1] + 1) * self.stride + coord[0] + 1
+        if self.board[point] != EMPTY:
+            self.remove_stone(point)
+        if color != Color.EMPTY:
+            self.add_stone(point, color.value)
+
+    def add_stone(self, point: int, color: int):
+        board = self.board
+        chain = self.chain
+        liberties = self.liberties
+        board[point] = color
+        self.hash ^= self.zobrist_keys[color][point]
+        self.remove_empty_point(point)
+        chain[point] = point
+        self.next_stone[point] = point
+        self.chain_size[point] = 1
+        point_liberties = set()
+        for neighbor in self.neighbor_table[point]:
+            if board[neighbor] == EMPTY:
+                point_liberties.add(neighbor)
+            else:
+                liberties[chain[neighbor]].discard(point)
+        liberties[point] = point_liberties
+        for neighbor in self.neighbor_table[point]:
+            if board[neighbor] == color and chain[neighbor] != chain[point]:
+                self.merge_chains(chain[point], chain[neighbor])
+
+    def merge_chains(self, head: int, other: int):
+        chain = self.chain
+        next_stone = self.next_stone
+        # relabel the smaller chain so merging stays amortized O(log n) per stone
+        if self.chain_size[head] < self.chain_size[other]:
+            head, other = other, head
+        stone = other
+        while True:
+            chain[stone] = head
+            stone = next_stone[stone]
+            if stone == other:
+                break
+        next_stone[head], next_stone[other] = next_stone[other], next_stone[head]
+        self.chain_size[head] += self.chain_size[other]
+        self.liberties[head] |= self.liberties.pop(other)
+
+    def chain_stones(self, head: int) -> List[int]:
+        next_stone = self.next_stone
+        stones = [head]
+        stone = next_stone[head]
+        while stone != head:
+            stones.append(stone)
+            stone = next_stone[stone]
+        return stones
+
+    def remove_chain(self, head: int) -> List[int]:
+        board = self.board
+        chain = self.chain
+        liberties = self.liberties
+        stones = self.chain_stones(head)
+        for stone in stones:
+            self.hash ^= self.zobrist_keys[board[stone]][stone]
+            board[stone] = EMPTY
+            chain[stone] = 0
+            self.add_empty_point(stone)
+        del liberties[head]
+        for stone in stones:
+            for neighbor in self.neighbor_table[stone]:
+                if board[neighbor] != EMPTY:
+                    liberties[chain[neighbor]].add(stone)
+        return stones
+
+    def add_empty_point(self, point: int):
+        self.empty_index[point] = len(self.empty_points)
+        self.empty_points.append(point)
+
+    def remove_empty_point(self, point: int):
+        # swap the last empty point into the removed point's slot
+        index = self.empty_index[point]
+        last = self.empty_points.pop()
+        if last != point:
+            self.empty_points[index] = last
+            self.empty_index[last] = index
+        self.empty_index[point] = -1
+
+    def swap_empty_points(self, index: int, other: int):
+        empty_points = self.empty_points
+        empty_points[index], empty_points[other] = empty_points[other], empty_points[index]
+        self.empty_index[empty_points[index]] = index
+        self.empty_index[empty_points[other]] = other
+
+    def remove_stone(self, point: int):
+        # removing a single stone may split its chain, so the rest of the chain is rebuilt. this only
+        # happens for quantum stones, so it is fine for it to be slow
+        color = self.board[point]
+        if color == EMPTY:
+            return
+        stones = self.remove_chain(self.chain[point])
+        for stone in stones:
+            if stone != point:
+                self.add_stone(stone, color)
 
     def is_in_bounds(self, coord: Coordinate) -> bool:
         return 0 <= coord[0] < self.width and 0 <= coord[1] < self.height
 
     def serialize(self) -> List[List[Color]]:
-        return [[color for color in row] for row in self.board]
+        return [[Color(self.board[(y + 1) * self.stride + x + 1]) for x in range(self.width)] for y in range(self.height)]
 
     def neighbors(self, coord: Coordinate) -> List[Coordinate]:
-        deltas = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        return [(coord[0] + dx, coord[1] + dy) for dx, dy in deltas if self.is_in_bounds((coord[0] + dx, coord[1] + dy))]
+        return [self.coord(neighbor) for neighbor in self.neighbor_table[self.point(coord)]]
+
+    def area_score(self) -> int:
+        # black area minus white area. the area of a color is its stones and the empty regions that only
+        # touch its stones. the sweep labels every empty region once, from the first point of it it reaches
+        board = self.board
+        neighbor_table = self.neighbor_table
+        labeled = bytearray(len(board))
+        score = 0
+        for point in self.points():
+            color = board[point]
+            if color == BLACK:
+                score += 1
+            elif color == WHITE:
+                score -= 1
+            elif not labeled[point]:
+                labeled[point] = 1
+                region = [point]
+                size = 0
+                # bitwise or of the colors next to the region, BLACK | WHITE when it touches both
+                borders = EMPTY
+                while region:
+                    size += 1
+                    for neighbor in neighbor_table[region.pop()]:
+                        if board[neighbor] != EMPTY:
+                            borders |= board[neighbor]
+                        elif not labeled[neighbor]:
+                            labeled[neighbor] = 1
+                            region.append(neighbor)
+                if borders == BLACK:
+                    score += size
+                elif borders == WHITE:
+                    score -= size
+        return score
+
+    def copy(self) -> "BadukBoard":
+        board = BadukBoard.__new__(BadukBoard)
+        board.width = self.width
+        board.height = self.height
+        board.stride = self.stride
+        board.board = self.board[:]
+        board.neighbor_table = self.neighbor_table
+        board.chain = self.chain[:]
+        board.next_stone = self.next_stone[:]
+        board.chain_size = self.chain_size[:]
+        board.liberties = {head: set(liberties) for head, liberties in self.liberties.items()}
+        board.empty_points = self.empty_points[:]
+        board.empty_index = self.empty_index[:]
+        board.ko_point = self.ko_point
+        board.zobrist_keys = self.zobrist_keys
+        board.hash = self.hash
+        return board
 
 class QuantumGo:
     def __init__(self, width: int = 19, height: int = 19, komi: float = 6.5):
-        self.subgames = [BadukBoard(width, height), BadukBoard(width, height)]
+        self.subgames = [BadukBoard(width, height, 0), BadukBoard(width, height, 1)]
+        # action numbers of the board size
+        self.geometry = make_geometry(width, height)
         self.quantum_stones: List[Coordinate] = []
         self.komi = komi
         self.round = 0
@@ -43,6 +253,14 @@ class QuantumGo:
         self.current_player = Color.BLACK
         self.captures = {Color.BLACK: 0, Color.WHITE: 0}
         self.consecutive_passes = 0
+        # number of moves played so far, including passes
+        self.move_number = 0
+        # zobrist hash of everything except the stones on the subgames: the quantum stones, the player to
+        # move and a pending pass. get_hash combines it with the hashes of the subgames
+        self.quantum_keys = make_zobrist_keys(width, height, 2)[1:]
+        self.hash = 0
+        # PhaseTimer that times the capture checks while the search is profiled
+        self.timer = None
 
     def play_move(self, player: Color, move: object):
         if self.phase == "gameover":
@@ -55,28 +273,30 @@ class QuantumGo:
             if move == "resign":
                 self.phase = "gameover"
                 self.result = "B+R" if player == Color.WHITE else "W+R"
+                self.move_number += 1
                 return
             elif move == "pass":
+                self.move_number += 1
                 self.consecutive_passes += 1
+                for subgame in self.subgames:
+                    subgame.ko_point = 0
                 if self.consecutive_passes == 2:
                     self.phase = "gameover"
-                    score = sum(self.captures[Color.BLACK] for _ in self.subgames) - self.komi
-                    if score < 0:
-                        self.result = f"W+{-score}"
-                    elif score > 0:
-                        self.result = f"B+{score}"
-                    else:
-                        self.result = "Tie"
+                    self.result = format_result(self.score())
                     return
                 else:
                     self.current_player = Color.WHITE if self.current_player == Color.BLACK else Color.BLACK
+                    self.hash ^= WHITE_TO_MOVE_KEY ^ PASS_KEY
                     return
             else:
                 raise ValueError("Invalid move type")
         
+        if self.consecutive_passes:
+            self.hash ^= PASS_KEY
         self.consecutive_passes = 0
 
         if self.round < 2:
+            self.hash ^= self.quantum_keys[self.round][self.subgames[0].point(move)]
             self.quantum_stones.append(move)
             if self.round == 1:
                 self.subgames[0].set(self.quantum_stones[0], Color.BLACK)
@@ -84,80 +304,132 @@ class QuantumGo:
                 self.subgames[1].set(self.quantum_stones[1], Color.BLACK)
                 self.subgames[1].set(self.quantum_stones[0], Color.WHITE)
         else:
-            moves = [move, move]
-            
-            captures = []
-            for i in range(2):
-                subgame = self.subgames[i]
-                self.play_subgame_move(subgame, player, moves[i])
-                captures.append(self.deduce_captures(subgame, move))
+            for subgame in self.subgames:
+                self.play_subgame_move(subgame, player, move)
 
         self.round += 1
+        self.move_number += 1
         self.current_player = Color.WHITE if self.current_player == Color.BLACK else Color.BLACK
+        self.hash ^= WHITE_TO_MOVE_KEY
 
     def play_subgame_move(self, subgame: BadukBoard, player: Color, coord: Coordinate):
-        if subgame.at(coord) != Color.EMPTY:
+        point = subgame.point(coord)
+        if subgame.board[point] != EMPTY:
             raise ValueError("Cannot place a stone on an occupied intersection.")
-        subgame.set(coord, player)
-        self.remove_captures(subgame, player, coord)
+        subgame.add_stone(point, player.value)
+        if self.timer is None:
+            captured_stones = self.remove_captures(subgame, player, coord)
+        else:
+            start = time.perf_counter()
+            captured_stones = self.remove_captures(subgame, player, coord)
+            self.timer.add('captures', start)
+        # a single stone that captured a single stone and is left with one liberty is in ko
+        if len(captured_stones) == 1 and subgame.chain_size[subgame.chain[point]] == 1 and len(subgame.liberties[point]) == 1:
+            subgame.ko_point = subgame.point(captured_stones[0])
+        else:
+            subgame.ko_point = 0
 
     def remove_captures(self, subgame: BadukBoard, player: Color, coord: Coordinate, is_quantum: bool = False):
-        opponent = Color.BLACK if player == Color.WHITE else Color.WHITE
+        board = subgame.board
+        chain = subgame.chain
+        liberties = subgame.liberties
+        opponent = WHITE if player == Color.BLACK else BLACK
         captured_stones = []
         idx = 0
-        for neighbor in subgame.neighbors(coord):
-            if subgame.at(neighbor) == opponent:
-                group = self.get_group(subgame, neighbor)
-                if not self.group_has_liberties(subgame, group):
-                    self.captures[player] += len(group)
-                    for stone in group:
-                        subgame.set(stone, Color.EMPTY)
-                        captured_stones.append(stone)
-                        if stone in self.quantum_stones:
-                            #if quantum stone is captured, remove the same colored quantum stone from the other board
-                            other_quantum_stone = next(element for element in self.quantum_stones if element != stone)
-                            if(idx == 0): 
-                                self.subgames[0].set(other_quantum_stone, Color.EMPTY)
-                            else:
-                                self.subgames[1].set(other_quantum_stone, Color.EMPTY)
+        for neighbor in subgame.neighbor_table[subgame.point(coord)]:
+            if board[neighbor] == opponent and not liberties[chain[neighbor]]:
+                group = subgame.remove_chain(chain[neighbor])
+                self.captures[player] += len(group)
+                for point in group:
+                    stone = subgame.coord(point)
+                    captured_stones.append(stone)
+                    if stone in self.quantum_stones:
+                        #if quantum stone is captured, remove the same colored quantum stone from the other board
+                        other_quantum_stone = next(element for element in self.quantum_stones if element != stone)
+                        if(idx == 0): 
+                            self.subgames[0].set(other_quantum_stone, Color.EMPTY)
+                        else:
+                            self.subgames[1].set(other_quantum_stone, Color.EMPTY)
             idx += 1    
         return captured_stones
 
     def is_surrounded_by_same_color(self, subgame: BadukBoard, coord: Coordinate) -> bool:
-        color = subgame.at(coord)
-        return all(subgame.at(neighbor) == color for neighbor in subgame.neighbors(coord))
+        board = subgame.board
+        point = subgame.point(coord)
+        color = board[point]
+        return all(board[neighbor] == color for neighbor in subgame.neighbor_table[point])
 
     def get_group(self, subgame: BadukBoard, coord: Coordinate) -> List[Coordinate]:
-        color = subgame.at(coord)
-        stack = [coord]
-        group = set()
+        board = subgame.board
+        point = subgame.point(coord)
+        if board[point] != EMPTY:
+            return [subgame.coord(stone) for stone in subgame.chain_stones(subgame.chain[point])]
+        # empty regions are not tracked as chains
+        stack = [point]
+        group = {point}
         while stack:
             stone = stack.pop()
-            if stone not in group:
-                group.add(stone)
-                for neighbor in subgame.neighbors(stone):
-                    if subgame.at(neighbor) == color:
-                        stack.append(neighbor)
-        return list(group)
+            for neighbor in subgame.neighbor_table[stone]:
+                if board[neighbor] == EMPTY and neighbor not in group:
+                    group.add(neighbor)
+                    stack.append(neighbor)
+        return [subgame.coord(stone) for stone in group]
 
     def group_has_liberties(self, subgame: BadukBoard, group: List[Coordinate]) -> bool:
+        board = subgame.board
         for stone in group:
-            for neighbor in subgame.neighbors(stone):
-                if subgame.at(neighbor) == Color.EMPTY:
+            for neighbor in subgame.neighbor_table[subgame.point(stone)]:
+                if board[neighbor] == EMPTY:
                     return True
         return False
 
     def deduce_captures(self, subgame: BadukBoard, last_move: Coordinate) -> List[Coordinate]:
         captures = []
-        for coord in subgame.neighbors(last_move):
-            stone = subgame.at(coord)
-            if stone != Color.EMPTY:
-                group = self.get_group(subgame, coord)
-                if not self.group_has_liberties(subgame, group):
-                    if not self.is_surrounded_by_same_color(subgame, coord):
-                        captures.extend(group)
+        for neighbor in subgame.neighbor_table[subgame.point(last_move)]:
+            if subgame.board[neighbor] != EMPTY and not subgame.liberties[subgame.chain[neighbor]]:
+                if not self.is_surrounded_by_same_color(subgame, subgame.coord(neighbor)):
+                    captures.extend(self.get_group(subgame, subgame.coord(neighbor)))
         return captures
 
+    def copy(self) -> "QuantumGo":
+        game = QuantumGo.__new__(QuantumGo)
+        game.subgames = [subgame.copy() for subgame in self.subgames]
+        game.geometry = self.geometry
+        game.quantum_stones = self.quantum_stones.copy()
+        game.komi = self.komi
+        game.round = self.round
+        game.phase = self.phase
+        game.result = self.result
+        game.current_player = self.current_player
+        game.captures = self.captures.copy()
+        game.consecutive_passes = self.consecutive_passes
+        game.move_number = self.move_number
+        game.quantum_keys = self.quantum_keys
+        game.hash = self.hash
+        game.timer = self.timer
+        return game
+
+    def get_hash(self) -> int:
+        return self.subgames[0].hash ^ self.subgames[1].hash ^ self.hash
+
+    def compute_hash(self) -> int:
+        # the same hash as get_hash, computed from scratch
+        position_hash = 0
+        for subgame in self.subgames:
+            for point in subgame.points():
+                position_hash ^= subgame.zobrist_keys[subgame.board[point]][point]
+        for index, stone in enumerate(self.quantum_stones):
+            position_hash ^= self.quantum_keys[index][self.subgames[0].point(stone)]
+        if self.current_player == Color.WHITE:
+            position_hash ^= WHITE_TO_MOVE_KEY
+        if self.consecutive_passes:
+            position_hash ^= PASS_KEY
+        return position_hash
+
+    def score(self) -> float:
+        # area scoring on both subgames, each of them with komi for white
+        return sum(subgame.area_score() - self.komi for subgame in self.subgames)
+
     def get_board_state(self) -> Tuple[List[List[Color]], List[List[Color]]]:
         return self.subgames[0].serialize(), self.subgames[1].serialize()
 
@@ -169,7 +441,8 @@ class QuantumGoGUI:
         self.master = master
         self.game = game
         self.canvas_size = 500
-        self.cell_size = self.canvas_size // 19
+        self.width, self.height = game.geometry.get_size()
+        self.cell_size = self.canvas_size // max(self.width, self.height)
 
         self.canvas1 = tk.Canvas(master, width=self.canvas_size, height=self.canvas_size, bg="white")
         self.canvas2 = tk.Canvas(master, width=self.canvas_size, height=self.canvas_size, bg="white")
@@ -182,9 +455,10 @@ class QuantumGoGUI:
 
     def draw_board(self, canvas):
         offset = self.cell_size // 2
-        for i in range(19):
-            canvas.create_line(offset + self.cell_size * i, offset, offset + self.cell_size * i, self.canvas_size - offset)
-            canvas.create_line(offset, offset + self.cell_size * i, self.canvas_size - offset, offset + self.cell_size * i)
+        for i in range(self.width):
+            canvas.create_line(offset + self.cell_size * i, offset, offset + self.cell_size * i, offset + self.cell_size * (self.height - 1))
+        for i in range(self.height):
+            canvas.create_line(offset, offset + self.cell_size * i, offset + self.cell_size * (self.width - 1), offset + self.cell_size * i)
 
     def update_boards(self):
         board1, board2 = self.game.get_board_state()
@@ -193,8 +467,8 @@ class QuantumGoGUI:
 
     def draw_stones(self, canvas, board):
         canvas.delete("stones")
-        for y in range(19):
-            for x in range(19):
+        for y in range(self.height):
+            for x in range(self.width):
                 color = board[y][x]
                 if color != Color.EMPTY:
                     is_quantum = (x, y) in self.game.quantum_stones
@@ -235,25 +509,21 @@ class QuantumGoGUI:
 
 class LocalSimulatorWithGUI():
 
-    def __init__(self):
+    def __init__(self, game: Optional[QuantumGo] = None, size: int = 19):
         self.root = tk.Tk()
-        self.game = QuantumGo()
+        self.game = QuantumGo(size, size) if game is None else game
         self.gui = QuantumGoGUI(self.root, self.game)
         self.display_board()
 
-    def play_moves(self, actions):
-        index = 0
-        for action in actions:
-
-            player = Color.BLACK if index % 2 == 0 else Color.WHITE
+    def play_move(self, action):
 
-            action = 'pass' if action == 361 else action_map_19x19[action]
+        self.game.play_move(self.game.current_player, self.game.geometry.moves[action])
 
-            self.game.play_move(player, action)
-
-            index +=1    
+        self.display_board()
 
-            self.display_board()
+    def play_moves(self, actions):
+        for action in actions:
+            self.play_move(action)
 
     def get_result(self):
         return self.game.get_result()
@@ -263,22 +533,21 @@ class LocalSimulatorWithGUI():
         self.root.update()
 
 class LocalSimulator():
-    def __init__(self):
-        self.game = QuantumGo()
+    def __init__(self, game: Optional[QuantumGo] = None, size: int = 19):
+        self.game = QuantumGo(size, size) if game is None else game
 
-    def play_moves(self, actions):
+    def play_move(self, action):
 
-        for index, action in enumerate(actions):
+        self.game.play_move(self.game.current_player, self.game.geometry.moves[action])
 
-            player = Color.BLACK if index % 2 == 0 else Color.WHITE
+    def play_moves(self, actions):
 
-            action = 'pass' if action == 361 else action_map_19x19[action]
+        for action in actions:
 
-            self.game.play_move(player, action)        
+            self.play_move(action)
 
     def get_result(self):
         return self.game.get_result()
     
     def display_board(self):
         pass
-    
\ No newline at end of file
@@ -1,9 +1,11 @@
-from engine import MCTS
+from engine import arg_parser, make_engine
+from transport import make_transport
 
 class QuantumGame():
             
     def __init__(self):
-        engine = MCTS()
-        engine.run()
+        args = arg_parser()
+        engine = make_engine(args)
+        engine.run(make_transport(args.transport, args.server_url, args.size))
 
 env = QuantumGame()
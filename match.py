@@ -0,0 +1,141 @@
+import argparse
+import math
+import multiprocessing
+import random
+import shlex
+import time
+
+from engine import arg_parser, make_engine, get_winner
+from local_simulator import LocalSimulator
+
+# plays two engine settings against each other without a browser, with QuantumGo as the referee
+
+# z value of the 95% confidence interval of the win rate
+CONFIDENCE_Z = 1.96
+
+def match_arg_parser():
+    parser = argparse.ArgumentParser(description="Play two engine settings against each other without a browser")
+    parser.add_argument('--engine-a', default='', help="Options of the first engine as given to main.py, e.g. \"--playouts 2000\"")
+    parser.add_argument('--engine-b', default='', help="Options of the second engine as given to main.py")
+    parser.add_argument('--games', type=int, default=10, help="Number of games, the engines take turns playing black")
+    parser.add_argument('--processes', type=int, default=1, help="Number of games played at the same time")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed, game i is seeded with seed + i")
+    args = parser.parse_args()
+    if len({arg_parser(shlex.split(options)).size for options in (args.engine_a, args.engine_b)}) > 1:
+        parser.error("both engines need the same --size")
+    if args.processes > 1 and max(arg_parser(shlex.split(options)).workers for options in (args.engine_a, args.engine_b)) > 1:
+        parser.error("--processes and engines with --workers cannot be combined")
+    return args
+
+def play_game(job):
+
+    # plays one game in a worker process. returns the winner 'A', 'B' or None for a tie, the color of
+    # engine A, the number of moves and the seconds each engine spent on its moves
+    index, options_a, options_b, seed = job
+    random.seed(seed + index)
+
+    engines = {}
+    for name, options in (('A', options_a), ('B', options_b)):
+        args = arg_parser(shlex.split(options))
+        # the game is seeded as a whole, a seed per engine would reset the shared random state
+        args.seed = None
+        engines[name] = make_engine(args)
+
+    # engine A plays black in the even games
+    color_a = 'B' if index % 2 == 0 else 'W'
+    colors = {'B': 'A', 'W': 'B'} if color_a == 'B' else {'B': 'B', 'W': 'A'}
+    roots = {name: engine.create_root() for name, engine in engines.items()}
+    times = {'A': [], 'B': []}
+    referee = LocalSimulator(size=engines['A'].size)
+    pass_action = referee.game.geometry.pass_action
+    board_state = []
+    result = None
+
+    try:
+        while result is None:
+            name = colors['B'] if len(board_state) % 2 == 0 else colors['W']
+            engine = engines[name]
+            root = roots[name]
+
+            start = time.perf_counter()
+            if not root.get_children():
+                root.create_children(root.get_board_state(), root.get_action_space(), root)
+            move = engine.get_book_move(root)
+            if move is None:
+                engine.search(root)
+                move = root.get_best_move(engine.get_best_child(root))
+            spent = time.perf_counter() - start
+            engine.update_clock(spent)
+            times[name].append(spent)
+
+            try:
+                referee.play_move(move)
+            except ValueError:
+                # an illegal move loses the game
+                result = 'W+R' if len(board_state) % 2 == 0 else 'B+R'
+                break
+
+            board_state.append(move)
+            result = referee.get_result()
+
+            # both engines follow the game: the move is no longer available and its subtree becomes the root
+            for other_name, other_root in roots.items():
+                if move != pass_action:
+                    other_root.get_action_space().pop(move, None)
+                roots[other_name] = engines[other_name].advance_root(other_root, board_state)
+    finally:
+        for engine in engines.values():
+            engine.close()
+
+    winner = get_winner(result)
+    return (None if winner is None else colors[winner]), color_a, len(board_state), times
+
+def wilson_interval(wins, games):
+
+    # 95% Wilson score interval of a win rate, ties count as half a win
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    z2 = CONFIDENCE_Z * CONFIDENCE_Z
+    center = (rate + z2 / (2 * games)) / (1 + z2 / games)
+    margin = CONFIDENCE_Z * math.sqrt(rate * (1 - rate) / games + z2 / (4 * games * games)) / (1 + z2 / games)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def report(results):
+
+    games = len(results)
+    wins = sum(1 for winner, _, _, _ in results if winner == 'A')
+    losses = sum(1 for winner, _, _, _ in results if winner == 'B')
+    ties = games - wins - losses
+    score = wins + 0.5 * ties
+    low, high = wilson_interval(score, games)
+
+    print(f"Engine A: {wins} wins, {losses} losses, {ties} ties in {games} games")
+    print(f"Win rate of engine A: {score / games:.3f} (95% confidence interval {low:.3f} - {high:.3f})")
+
+    for color, color_name in (('B', 'black'), ('W', 'white')):
+        color_results = [winner for winner, color_a, _, _ in results if color_a == color]
+        if color_results:
+            print(f"Engine A as {color_name}: {sum(winner == 'A' for winner in color_results)} of {len(color_results)} won")
+
+    print(f"Average game length: {sum(moves for _, _, moves, _ in results) / games:.1f} moves")
+    for name in ('A', 'B'):
+        move_times = [spent for _, _, _, times in results for spent in times[name]]
+        if move_times:
+            print(f"Engine {name}: {sum(move_times) / len(move_times):.3f} seconds per move")
+
+def main():
+
+    args = match_arg_parser()
+    jobs = [(index, args.engine_a, args.engine_b, args.seed) for index in range(args.games)]
+
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(play_game, jobs, chunksize=1)
+    else:
+        results = [play_game(job) for job in jobs]
+
+    report(results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import mmap
+import struct
+
+# moves of the opening chosen by deep offline searches, see build_book.py. the book is a header followed by
+# one record per position, sorted by the position's hash. it is memory mapped and searched in place, so
+# opening it costs nothing however big it is and every lookup reads a few records
+
+BOOK_MAGIC = b'QGBOOK01'
+# magic, board size, number of records
+BOOK_HEADER = struct.Struct('<8sII')
+# position hash, move, playouts the move was searched with
+BOOK_RECORD = struct.Struct('<QII')
+
+def write_book(path, size, entries):
+
+    # entries maps position hashes to (move, playouts)
+    with open(path, 'wb') as file:
+        file.write(BOOK_HEADER.pack(BOOK_MAGIC, size, len(entries)))
+        for position_hash in sorted(entries):
+            move, playouts = entries[position_hash]
+            file.write(BOOK_RECORD.pack(position_hash, move, playouts))
+
+class OpeningBook:
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self.file.close()
+            raise ValueError(f"{path} is not an opening book")
+
+        if len(self.data) < BOOK_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+        magic, self.size, self.count = BOOK_HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or len(self.data) != BOOK_HEADER.size + self.count * BOOK_RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def get_size(self):
+        return self.size
+
+    def __len__(self):
+        return self.count
+
+    def get_entry(self, position_hash):
+
+        # (move, playouts) of the position, None if it is not in the book. binary search over the records
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_hash, move, playouts = BOOK_RECORD.unpack_from(self.data, BOOK_HEADER.size + middle * BOOK_RECORD.size)
+            if record_hash == position_hash:
+                return move, playouts
+            if record_hash < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get_move(self, position_hash):
+        entry = self.get_entry(position_hash)
+        return None if entry is None else entry[0]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
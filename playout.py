@@ -0,0 +1,212 @@
+import random
+import time
+
+from local_simulator import LocalSimulator
+from local_simulator import LocalSimulatorWithGUI
+from local_simulator import EMPTY, Color
+from geometry import make_geometry
+
+# a playout that gets longer than this many moves per point of the board is scored as it stands, random play
+# has no superko rule to stop it from cycling
+PLAYOUT_MOVES_PER_POINT = 3
+# a playout in which this many moves in a row were passes or ko captures is stuck in a double ko and is
+# scored as it stands
+MAX_KO_MOVES = 16
+
+class PlayoutLimits:
+
+    # when a playout stops before both players pass on their own. once the game is max_moves long the
+    # players pass and the position is scored by area, by default after PLAYOUT_MOVES_PER_POINT moves per
+    # point of the board. with mercy set, a player who has captured that many stones more than the other
+    # wins the playout at once
+
+    def __init__(self, max_moves=None, mercy=None):
+        self.max_moves = max_moves
+        self.mercy = mercy
+
+    def get_max_moves(self, width, height):
+        if self.max_moves is None:
+            return PLAYOUT_MOVES_PER_POINT * width * height
+        return self.max_moves
+
+    def get_mercy(self):
+        return self.mercy
+
+    def get_mercy_result(self, black_captures, white_captures):
+        # 'B+M' or 'W+M' once a player is far enough ahead in captures, None while the playout goes on
+        if self.mercy is None or abs(black_captures - white_captures) < self.mercy:
+            return None
+        return 'B+M' if black_captures > white_captures else 'W+M'
+
+def game_is_over(board_state, geometry):
+
+    return (len(board_state) > 0 and board_state[-1] == geometry.resign_action) or board_state[-2:] == [geometry.pass_action] * 2
+
+class PlayoutPolicy:
+
+    # chooses the random moves of a playout. candidates are the empty points of the first subgame, which
+    # the board keeps up to date through placements and captures. a candidate is played if it is empty
+    # on the second subgame too, is not a ko recapture or suicide and does not fill an eye of the player
+    # to move on either subgame. when no candidate is left the player passes
+
+    def __init__(self, game):
+        self.game = game
+        # the action of every point of the flat board layout
+        self.actions = game.geometry.point_actions
+        self.pass_action = game.geometry.pass_action
+
+    def select_action(self):
+        game = self.game
+        first = game.subgames[0]
+        empty_points = first.empty_points
+        color = game.current_player.value
+        count = len(empty_points)
+
+        while count > 0:
+            index = int(random.random() * count)
+            point = empty_points[index]
+            if self.is_playable(point, color):
+                return self.actions[point]
+            # move the rejected point out of the sampled range, so every candidate is tried at most once
+            count -= 1
+            first.swap_empty_points(index, count)
+
+        return self.pass_action
+
+    def is_playable(self, point, color):
+        game = self.game
+        first, second = game.subgames
+
+        if second.board[point] != EMPTY or point == first.ko_point or point == second.ko_point:
+            return False
+
+        if game.round < 2:
+            # quantum stones are only put on the boards after the second one is played
+            return first.coord(point) not in game.quantum_stones
+
+        return not (self.is_eye(first, point, color) or self.is_eye(second, point, color)
+                    or self.is_suicide(first, point, color) or self.is_suicide(second, point, color))
+
+    def is_eye(self, subgame, point, color):
+        board = subgame.board
+        for neighbor in subgame.neighbor_table[point]:
+            if board[neighbor] != color:
+                return False
+        return True
+
+    def is_suicide(self, subgame, point, color):
+        board = subgame.board
+        chain = subgame.chain
+        liberties = subgame.liberties
+        for neighbor in subgame.neighbor_table[point]:
+            neighbor_color = board[neighbor]
+            if neighbor_color == EMPTY:
+                return False
+            neighbor_liberties = len(liberties[chain[neighbor]])
+            if neighbor_color == color:
+                if neighbor_liberties > 1:
+                    return False
+            elif neighbor_liberties == 1:
+                # the move captures this chain
+                return False
+        return True
+
+def simulate(prev_board_state, game=None, limits=None, timer=None):
+
+    # plays random moves after prev_board_state until both players pass or limits stop the playout. game
+    # is an optional QuantumGo position reached by the first moves of prev_board_state, which the playout
+    # is free to change. only the moves after it are replayed. timer is a PhaseTimer that gets the time
+    # of the replay and of every move while the search is profiled
+
+    total_moves = len(prev_board_state)
+    geometry = make_geometry(19) if game is None else game.geometry
+
+    if total_moves > 0 and prev_board_state[-1] == geometry.resign_action:
+        return 'B' if total_moves % 2 == 0 else 'W'
+
+    if timer is not None:
+        start = time.perf_counter()
+
+    game = LocalSimulator(game)
+    game.play_moves(prev_board_state[game.game.move_number:])
+
+    if timer is not None:
+        timer.add('replay', start)
+        game.game.timer = timer
+
+    if limits is None:
+        limits = PlayoutLimits()
+
+    policy = PlayoutPolicy(game.game)
+    first, second = game.game.subgames
+    max_moves = limits.get_max_moves(first.width, first.height)
+    captures = game.game.captures
+    pass_action = geometry.pass_action
+    ko_moves = 0
+
+    while game.get_result() is None:
+
+        if timer is not None:
+            start = time.perf_counter()
+
+        if game.game.move_number < max_moves and ko_moves < MAX_KO_MOVES:
+            action = policy.select_action()
+        else:
+            action = pass_action
+
+        if timer is not None:
+            timer.add('move generation', start)
+            start = time.perf_counter()
+
+        game.play_move(action)
+
+        if timer is not None:
+            # the move that ends the game also scores it
+            timer.add('board update' if game.get_result() is None else 'scoring', start)
+
+        if action == pass_action or first.ko_point or second.ko_point:
+            ko_moves += 1
+        else:
+            ko_moves = 0
+
+        if action != pass_action:
+            mercy_result = limits.get_mercy_result(captures[Color.BLACK], captures[Color.WHITE])
+            if mercy_result is not None:
+                return mercy_result
+
+    #need next two lines if running with GUI
+    #game.display_board()
+    #game.root.destroy()
+
+    return game.get_result()
+
+def record_playout(simulator, limits=None):
+
+    # plays random moves on simulator, a LocalSimulator, until the game is over, stopping like simulate
+    # does without the mercy rule. returns the actions played and the indexes of those that captured
+    # stones, for replaying the same game on the other simulators
+    if limits is None:
+        limits = PlayoutLimits()
+
+    game = simulator.game
+    policy = PlayoutPolicy(game)
+    first, second = game.subgames
+    max_moves = limits.get_max_moves(first.width, first.height)
+    pass_action = game.geometry.pass_action
+    actions = []
+    capturing_moves = []
+    ko_moves = 0
+
+    while simulator.get_result() is None:
+        if game.move_number < max_moves and ko_moves < MAX_KO_MOVES:
+            action = policy.select_action()
+        else:
+            action = pass_action
+        captures = sum(game.captures.values())
+        simulator.play_move(action)
+        if sum(game.captures.values()) > captures:
+            capturing_moves.append(len(actions))
+        actions.append(action)
+        ko_moves = ko_moves + 1 if action == pass_action or first.ko_point or second.ko_point else 0
+
+    return actions, capturing_moves
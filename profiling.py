@@ -0,0 +1,46 @@
+import cProfile
+import pstats
+import time
+
+# functions printed from the profile of a move
+PROFILE_LINES = 25
+
+class PhaseTimer:
+
+    # number of calls and seconds spent in every phase of the search, reported and reset once per move.
+    # the search and the playouts only call it when profiling is turned on, so it costs nothing otherwise
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, start):
+        # counts one call of phase that began at start, a time.perf_counter() value
+        elapsed = time.perf_counter() - start
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def get_phases(self):
+        return self.phases
+
+    def reset(self):
+        self.phases = {}
+
+    def report(self):
+        lines = []
+        for phase, (calls, seconds) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{phase:<20} {calls:>10} calls {seconds:10.3f} s {seconds / calls * 1e6:10.1f} us per call")
+        return "\n".join(lines)
+
+def profile_call(path, function, *args):
+
+    # runs function under cProfile, writes the stats to path for pstats or snakeviz and prints the
+    # functions with the most cumulative time
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args)
+    profiler.dump_stats(path)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return result
@@ -0,0 +1,80 @@
+import multiprocessing
+import random
+
+from local_simulator import QuantumGo
+from playout import simulate
+from batch_simulator import simulate_batch
+from bitboard import BitboardQuantumGo, simulate as simulate_bitboard
+
+# every worker process keeps an empty game of the pool's board size for playouts that do not come with
+# a position
+_empty_game = None
+
+def init_worker(size=19):
+    global _empty_game
+    _empty_game = QuantumGo(size, size)
+
+def run_playouts(job):
+    # every chunk is seeded by the parent process, so forked workers do not all play the same games and a
+    # seeded search gives the same results however the chunks are spread over the workers
+    seed, game, board_states, simulator, limits = job
+    random.seed(seed)
+    return play_chunk(_empty_game if game is None else game, board_states, simulator, limits)
+
+def play_chunk(game, board_states, simulator, limits):
+    # game is the position the board states start from, the playouts only play copies of it
+    if simulator == 'numpy':
+        return simulate_batch(board_states, game, limits)
+    if simulator == 'bitboard':
+        # the position is converted once per chunk, copies of a bitboard game are cheap
+        game = BitboardQuantumGo.from_game(game)
+        return [simulate_bitboard(board_state, game.copy(), limits) for board_state in board_states]
+    return [simulate(board_state, game.copy(), limits) for board_state in board_states]
+
+class RolloutPool:
+
+    # runs playouts on a pool of worker processes. the simulator is pure Python, so threads would not
+    # run playouts in parallel
+
+    def __init__(self, workers, simulator='python', limits=None, size=19):
+        self.workers = workers
+        self.simulator = simulator
+        self.limits = limits
+        self.pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(size,))
+
+    def run(self, board_states, game=None):
+        # game is an optional position reached by the first moves of every board state. it is sent once
+        # per chunk and the playouts only replay the moves after it
+        # a few chunks per worker keeps them busy when some playouts are much longer than others. the batch
+        # simulator is faster the more games it plays at once, so it gets one chunk per worker
+        if self.simulator == 'numpy':
+            chunk_size = max(1, -(-len(board_states) // self.workers))
+        else:
+            chunk_size = max(1, len(board_states) // (self.workers * 4))
+        jobs = [(random.getrandbits(32), game, board_states[i:i + chunk_size], self.simulator, self.limits) for i in range(0, len(board_states), chunk_size)]
+        return [result for results in self.pool.map(run_playouts, jobs) for result in results]
+
+    def map(self, function, jobs):
+        return self.pool.map(function, jobs, chunksize=1)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+class LocalRollouts:
+
+    # runs the playouts of a batch with the numpy or bitboard simulator in this process, for a single worker
+
+    def __init__(self, simulator, limits=None, size=19):
+        self.simulator = simulator
+        self.limits = limits
+        self.empty_game = QuantumGo(size, size)
+
+    def run(self, board_states, game=None):
+        return play_chunk(self.empty_game if game is None else game, board_states, self.simulator, self.limits)
+
+    def map(self, function, jobs):
+        return [function(job) for job in jobs]
+
+    def close(self):
+        pass
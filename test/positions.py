@@ -0,0 +1,28 @@
+from local_simulator import QuantumGo, Color
+
+class SmallBoardPositions:
+    # positions on a 5x5 board after both quantum stones, shared by the tests of the simulators that are
+    # checked against QuantumGo
+    def setUp(self):
+        self.game = QuantumGo(5, 5)
+        self.game.play_move(Color.BLACK, (4, 4))
+        self.game.play_move(Color.WHITE, (4, 0))
+
+    def set_stones(self, coords, color):
+        for coord in coords:
+            for subgame in self.game.subgames:
+                subgame.set(coord, color)
+
+    def set_capture(self):
+        # white at (0, 0) captures the black stones at (1, 0) and (0, 1)
+        self.set_stones([(1, 0), (0, 1)], Color.BLACK)
+        self.set_stones([(2, 0), (1, 1), (0, 2)], Color.WHITE)
+
+    def set_ko(self):
+        # black at (2, 1) takes the white stone at (1, 1) and leaves a ko there
+        self.set_stones([(1, 0), (0, 1), (1, 2)], Color.BLACK)
+        self.set_stones([(1, 1), (2, 0), (3, 1), (2, 2)], Color.WHITE)
+
+    def set_eye(self):
+        # (0, 0) is an eye of black
+        self.set_stones([(1, 0), (0, 1)], Color.BLACK)
@@ -0,0 +1,72 @@
+import random
+import unittest
+import numpy as np
+from local_simulator import Color, LocalSimulator
+from playout import PlayoutPolicy, record_playout
+from batch_simulator import BatchSimulator, simulate_batch
+from .positions import SmallBoardPositions
+
+def board_array(game):
+    return np.array([[[color.value for color in row] for row in subgame.serialize()] for subgame in game.subgames])
+
+class TestBatchSimulator(SmallBoardPositions, unittest.TestCase):
+    def test_capture(self):
+        self.set_capture()
+        self.game.play_move(Color.BLACK, (2, 2))
+        batch = BatchSimulator([self.game])
+        batch.play([0])
+        self.game.play_move(Color.WHITE, (0, 0))
+        self.assertTrue(np.array_equal(batch.get_boards()[0], board_array(self.game)))
+        self.assertEqual(batch.black_captures[0], 0)
+
+    def test_eye_and_suicide_are_not_candidates(self):
+        self.set_eye()
+        batch = BatchSimulator([self.game])
+        self.assertFalse(batch.get_candidates(np.array([0]))[0, 0] & 1)
+        # white at (0, 0) would have no liberties and capture nothing
+        batch.current_player[0] = Color.WHITE.value
+        suicide = batch.play_moves(np.array([0]), np.array([0]), np.array([0]))
+        self.assertTrue(suicide[0])
+        self.assertTrue(np.array_equal(batch.get_boards()[0], board_array(self.game)))
+
+    def test_ko_point(self):
+        self.set_ko()
+        batch = BatchSimulator([self.game])
+        # black takes the white stone at (1, 1) from (2, 1), which leaves a ko at (1, 1)
+        batch.play([2 * 5 + 1])
+        self.game.play_move(Color.BLACK, (2, 1))
+        self.assertEqual(batch.ko_points[0, 0], 1 * 5 + 1)
+        self.assertEqual(self.game.subgames[0].ko_point, self.game.subgames[0].point((1, 1)))
+
+    def test_replays_local_simulator(self):
+        random.seed(0)
+        games = []
+        actions = []
+        for _ in range(3):
+            simulator = LocalSimulator()
+            policy = PlayoutPolicy(simulator.game)
+            while simulator.game.round < 2:
+                simulator.play_move(policy.select_action())
+            games.append(simulator.game.copy())
+            game_actions, _ = record_playout(simulator)
+            actions.append((game_actions, board_array(simulator.game), simulator.get_result()))
+
+        pass_action = games[0].geometry.pass_action
+        batch = BatchSimulator(games)
+        for step in range(max(len(game_actions) for game_actions, _, _ in actions)):
+            batch.play([game_actions[step] if step < len(game_actions) else pass_action for game_actions, _, _ in actions])
+        for index, (_, board, result) in enumerate(actions):
+            self.assertTrue(np.array_equal(batch.get_boards()[index], board))
+            self.assertEqual(batch.results[index], result)
+
+    def test_simulate_batch(self):
+        random.seed(0)
+        results = simulate_batch([[0, 20], [0, 20, 40], [0, 20, 362]])
+        self.assertEqual(len(results), 3)
+        # black resigns on the third move
+        self.assertEqual(results[2], 'W')
+        for result in results:
+            self.assertIn(result[0], 'BWT')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+from local_simulator import Color, LocalSimulator
+from playout import record_playout
+from bitboard import BitboardQuantumGo, BitboardPlayoutPolicy, nth_bit, simulate
+from .positions import SmallBoardPositions
+
+class TestBitboard(SmallBoardPositions, unittest.TestCase):
+    def test_capture(self):
+        self.set_capture()
+        self.game.play_move(Color.BLACK, (2, 2))
+        bitboard_game = BitboardQuantumGo.from_game(self.game)
+        bitboard_game.play_move(Color.WHITE, (0, 0))
+        self.game.play_move(Color.WHITE, (0, 0))
+        self.assertEqual(bitboard_game.get_board_state(), self.game.get_board_state())
+        self.assertEqual(bitboard_game.captures, self.game.captures)
+
+    def test_ko_point(self):
+        self.set_ko()
+        bitboard_game = BitboardQuantumGo.from_game(self.game)
+        bitboard_game.play_move(Color.BLACK, (2, 1))
+        self.assertEqual(bitboard_game.subgames[0].ko_point, bitboard_game.geometry.bit((1, 1)))
+        policy = BitboardPlayoutPolicy(bitboard_game)
+        for _ in range(20):
+            self.assertNotEqual(policy.select_action(), 1 * 5 + 1)
+
+    def test_eye_and_suicide_are_not_playable(self):
+        self.set_eye()
+        bitboard_game = BitboardQuantumGo.from_game(self.game)
+        policy = BitboardPlayoutPolicy(bitboard_game)
+        corner = bitboard_game.geometry.bit((0, 0))
+        self.assertFalse(policy.is_playable(corner, Color.BLACK.value))
+        self.assertFalse(policy.is_playable(corner, Color.WHITE.value))
+
+    def test_nth_bit(self):
+        stones = 0b1011010
+        self.assertEqual([nth_bit(stones, n) for n in range(4)], [1, 3, 4, 6])
+
+    def test_replays_local_simulator(self):
+        random.seed(0)
+        for _ in range(3):
+            simulator = LocalSimulator()
+            actions, _ = record_playout(simulator)
+            bitboard_game = BitboardQuantumGo()
+            for action in actions:
+                bitboard_game.play_action(action)
+            self.assertEqual(bitboard_game.get_board_state(), simulator.game.get_board_state())
+            self.assertEqual(bitboard_game.get_result(), simulator.get_result())
+
+    def test_simulate(self):
+        random.seed(0)
+        self.assertIn(simulate([0, 20])[0], 'BWT')
+        # black resigns on the third move
+        self.assertEqual(simulate([0, 20, 362]), 'W')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import os
+import tempfile
+import time
+import unittest
+from engine import MCTS, Node
+from geometry import GEOMETRY_5x5
+from local_simulator import LocalSimulator
+from opening_book import write_book
+
+class FakeTransport:
+    # stand-in for a transport: white answers every move of the engine with the next of its replies once
+    # the engine has checked for it a few times
+    def __init__(self, replies, checks=2):
+        self.replies = list(replies)
+        self.checks = checks
+        self.moves = []
+        self.waits = 0
+        self.started = False
+        self.closed = False
+
+    def start(self):
+        self.started = True
+
+    def play_move(self, action):
+        self.moves.append(action)
+
+    def get_moves(self):
+        return list(self.moves)
+
+    def wait_for_moves(self, count, timeout=None):
+        self.waits += 1
+        if len(self.moves) <= count and self.waits >= self.checks:
+            self.waits = 0
+            self.moves.append(self.replies.pop(0))
+        return list(self.moves)
+
+    def opponent_passed(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def get_hash(board_state):
+    simulator = LocalSimulator(size=5)
+    simulator.play_moves(board_state)
+    return simulator.game.get_hash()
+
+class TestEngine(unittest.TestCase):
+    def test_backpropagate(self):
+        # the node of black's move counts black's wins, its parent counts white's
+        root = Node([], GEOMETRY_5x5.action_map.copy(), None, 0, 0, None)
+        child = Node(None, None, root, 0, 0, 0)
+        child.backpropagate('B+R')
+        child.backpropagate('W+6.5')
+        child.backpropagate('Tie')
+        self.assertEqual((child.get_games_played(), child.get_games_won()), (3, 1))
+        self.assertEqual((root.get_games_played(), root.get_games_won()), (3, 1))
+        grandchild = Node(None, None, child, 0, 0, 24)
+        grandchild.backpropagate('W+6.5')
+        self.assertEqual(grandchild.get_games_won(), 1)
+        self.assertEqual(child.get_games_won(), 1)
+        self.assertEqual(root.get_games_won(), 2)
+
+    def test_budget(self):
+        engine = MCTS(playouts=25, seed=0, size=5)
+        self.assertTrue(engine.has_budget(24, None, 25))
+        self.assertFalse(engine.has_budget(25, None, 25))
+        self.assertFalse(engine.has_budget(0, time.monotonic() - 1, None))
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        try:
+            self.assertEqual(engine.search(root), 25)
+        finally:
+            engine.close()
+        self.assertEqual(root.get_games_played(), 25)
+
+    def test_exhausted_clock(self):
+        # with no time left every root child still gets a playout, and resigning is never chosen blindly
+        for seed in range(20):
+            engine = MCTS(game_time=1.5, seed=seed, size=5)
+            root = engine.create_root()
+            root.create_children(root.get_board_state(), root.get_action_space(), root)
+            try:
+                self.assertEqual(engine.search(root), len(root.get_children()))
+            finally:
+                engine.close()
+            self.assertNotEqual(engine.get_best_child(root).get_next_move(), GEOMETRY_5x5.resign_action)
+
+    def test_board_state(self):
+        # only the root keeps its moves, the nodes below it rebuild them from their parents
+        root = Node([0], GEOMETRY_5x5.action_map.copy(), None, 0, 0, None)
+        child = Node(None, None, root, 0, 0, 24)
+        grandchild = Node(None, None, child, 0, 0, 12)
+        self.assertEqual(grandchild.get_board_state(), [0, 24, 12])
+        self.assertEqual(child.get_board_state(), [0, 24])
+        self.assertEqual(root.get_board_state(), [0])
+        self.assertEqual(grandchild.get_last_move(), 12)
+
+    def test_advance_root(self):
+        engine = MCTS(playouts=300, tt_size=0, seed=0, size=5)
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        try:
+            engine.search(root)
+        finally:
+            engine.close()
+        child = root.get_most_visited_child()
+        grandchild = child.get_most_visited_child()
+        games_played, children = grandchild.get_games_played(), grandchild.get_children()
+
+        new_root = engine.advance_root(root, [child.get_next_move(), grandchild.get_next_move()])
+        self.assertIs(new_root, grandchild)
+        self.assertIsNone(new_root.get_parent())
+        self.assertEqual(new_root.get_games_played(), games_played)
+        self.assertIs(new_root.get_children(), children)
+        self.assertEqual(new_root.get_board_state(), [child.get_next_move(), grandchild.get_next_move()])
+        self.assertEqual(new_root.get_game().move_number, 2)
+
+    def test_advance_root_fallback(self):
+        # moves that are not in the tree, or do not follow the root's, start a fresh root
+        engine = MCTS(size=5)
+        root = engine.create_root([0])
+        root.set_games_played(10)
+        fresh = engine.advance_root(root, [0, 24])
+        self.assertIsNot(fresh, root)
+        self.assertEqual((fresh.get_games_played(), fresh.get_board_state()), (0, [0, 24]))
+        fresh = engine.advance_root(root, [1, 24])
+        self.assertEqual((fresh.get_games_played(), fresh.get_board_state()), (0, [1, 24]))
+
+    def test_run_pondering(self):
+        # the book plays 12 and then resigns after white's reply, so the game ends after white's first move
+        handle, path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+        try:
+            write_book(path, 5, {get_hash([]): (12, 1), get_hash([12, 6]): (GEOMETRY_5x5.resign_action, 1)})
+            engine = MCTS(playouts=10, ponder=True, seed=0, size=5, book=path)
+            pondered = []
+            ponder = engine.ponder
+            engine.ponder = lambda root: pondered.append(root) or ponder(root)
+            transport = FakeTransport([6])
+            engine.run(transport)
+        finally:
+            os.remove(path)
+        self.assertTrue(transport.started and transport.closed)
+        self.assertEqual(transport.moves, [12, 6, GEOMETRY_5x5.resign_action])
+        # the engine searched below its own move until the reply came
+        self.assertEqual(len(pondered), 1)
+        self.assertEqual(pondered[0].get_board_state(), [12])
+        self.assertGreater(pondered[0].get_games_played(), 0)
+
+    def test_run_retake_and_double_pass(self):
+        # white captures the black stone on 0 and plays there again, then both players pass and the game ends
+        handle, path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+        pass_action = GEOMETRY_5x5.pass_action
+        black = {(): 24, (24, 20): 0, (24, 20, 0, 5): 12, (24, 20, 0, 5, 12, 1): 13, (24, 20, 0, 5, 12, 1, 13, 0): pass_action}
+        try:
+            write_book(path, 5, {get_hash(list(board_state)): (move, 1) for board_state, move in black.items()})
+            engine = MCTS(playouts=10, seed=0, size=5, book=path)
+            transport = FakeTransport([20, 5, 1, 0, pass_action], checks=1)
+            engine.run(transport)
+        finally:
+            os.remove(path)
+        self.assertTrue(transport.closed)
+        self.assertEqual(transport.moves, [24, 20, 0, 5, 12, 1, 13, 0, pass_action, pass_action])
+
+    def test_link_children(self):
+        # the children of an expanded leaf share the statistics of their own positions
+        engine = MCTS(size=5)
+        root = engine.create_root([0, 24])
+        engine.set_root_game(root)
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        engine.link_children(root, root.get_children())
+        for child in root.get_children():
+            if child.is_terminal(engine.geometry):
+                self.assertIsNone(child.get_transposition())
+            else:
+                self.assertIs(engine.transposition_table.get(child.get_position().get_hash()), child.get_transposition())
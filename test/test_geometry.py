@@ -0,0 +1,53 @@
+import unittest
+from action_space import make_action_map
+from offset_moves import get_offset_9x9
+from geometry import make_geometry
+from local_simulator import LocalSimulator
+from engine import MCTS
+
+class TestGeometry(unittest.TestCase):
+    def test_actions(self):
+        geometry = make_geometry(5)
+        self.assertEqual(geometry.action_map, make_action_map(5))
+        self.assertEqual((geometry.pass_action, geometry.resign_action), (25, 26))
+        self.assertEqual(geometry.reverse_action_map[(1, 2)], 7)
+        self.assertIs(make_geometry(5), geometry)
+
+    def test_tables(self):
+        geometry = make_geometry(19)
+        action = geometry.reverse_action_map[(3, 15)]
+        self.assertEqual(geometry.moves[action], (3, 15))
+        self.assertEqual(geometry.moves[geometry.pass_action], 'pass')
+        self.assertEqual(geometry.sgf_points[action], 'dp')
+        self.assertEqual(geometry.sgf_actions['dp'], action)
+        with self.assertRaises(TypeError):
+            geometry.action_map[0] = 'pass'
+
+    def test_neighbors(self):
+        geometry = make_geometry(9)
+        self.assertEqual(sorted(geometry.neighbors[0]), [1, 9])
+        self.assertEqual(len(geometry.neighbors[geometry.reverse_action_map[(4, 4)]]), 4)
+
+    def test_click_offsets(self):
+        geometry = make_geometry(9)
+        action = geometry.reverse_action_map[(2, 7)]
+        self.assertEqual(geometry.get_click_offset(action), get_offset_9x9((2, 7)))
+        with self.assertRaises(ValueError):
+            make_geometry(13).get_click_offset(0)
+
+    def test_small_board_game(self):
+        simulator = LocalSimulator(size=5)
+        simulator.play_moves([0, 24, 25, 25])
+        self.assertIsNotNone(simulator.get_result())
+
+    def test_small_board_search(self):
+        engine = MCTS(playouts=50, seed=0, size=9)
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        # pass is not allowed while the quantum stones are placed, resign is
+        self.assertEqual(len(root.get_children()), 82)
+        engine.search(root)
+        self.assertLess(root.get_best_move(engine.get_best_child(root)), 82)
+
+if __name__ == '__main__':
+    unittest.main()
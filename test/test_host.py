@@ -0,0 +1,84 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import host
+from host import BotHost, Game, search_move
+from action_space import reverse_action_map_19x19
+
+class GameServer(BaseHTTPRequestHandler):
+    # stand-in for the game server with any number of games, the opponents never move
+    games = {}
+    lock = threading.Lock()
+
+    def reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        parts = self.path.strip('/').split('/')
+        with GameServer.lock:
+            if parts == ['api', 'game']:
+                game_id = f'g{len(GameServer.games) + 1}'
+                GameServer.games[game_id] = []
+                self.reply(json.dumps({'id': game_id}).encode())
+                return
+            if parts[-1] == 'move':
+                GameServer.games[parts[2]].append(f';B[{body["0"]}]')
+        self.reply(b'{}')
+
+    def do_GET(self):
+        with GameServer.lock:
+            moves = ''.join(GameServer.games[self.path.strip('/').split('/')[2]])
+        self.reply(('(;GM[1]' + moves + ')').encode())
+
+    def log_message(self, *args):
+        pass
+
+class TestHost(unittest.TestCase):
+    def test_search_move(self):
+        board_state = [reverse_action_map_19x19[(3, 3)], reverse_action_map_19x19[(15, 15)]]
+        move, num_playouts = search_move(('--playouts 10 --seed 1', board_state, None, time.time()))
+        self.assertNotIn(move, board_state)
+        self.assertEqual(num_playouts, 10)
+
+    def test_search_move_queue_wait(self):
+        # a job that waited for a worker longer than its clock had left still searches every move once
+        move, num_playouts = search_move(('--game-time 60 --size 5', [0, 24], 60, time.time() - 120))
+        self.assertNotIn(move, [0, 24])
+        # one playout for each of the 23 empty points, the pass and the resignation
+        self.assertEqual(num_playouts, 25)
+
+    def test_follow(self):
+        game = Game('game', None, '--game-time 60')
+        self.assertEqual(game.time_left, 60)
+        self.assertTrue(game.follow([reverse_action_map_19x19[(3, 3)], reverse_action_map_19x19[(15, 15)]]))
+        # a point that is already taken
+        self.assertFalse(game.follow(game.board_state + [reverse_action_map_19x19[(3, 3)]]))
+        self.assertEqual(len(game.board_state), 2)
+
+    def test_host_games(self):
+        # the opponent never moves, so every game ends after the engine's first move
+        GameServer.games = {}
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GameServer)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with mock.patch.object(host, 'OPPONENT_TIMEOUT', 0.2):
+                results = asyncio.run(BotHost(f'http://127.0.0.1:{server.server_port}/', 2).run('--playouts 5', 2, []))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(results, [None, None])
+        self.assertEqual(sorted(GameServer.games), ['g1', 'g2'])
+        self.assertEqual([len(moves) for moves in GameServer.games.values()], [1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
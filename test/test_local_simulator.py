@@ -0,0 +1,108 @@
+import unittest
+from local_simulator import BadukBoard, Color, QuantumGo, BORDER
+
+class TestBadukBoard(unittest.TestCase):
+    def test_neighbors(self):
+        board = BadukBoard(19, 19)
+        self.assertCountEqual(board.neighbors((0, 0)), [(1, 0), (0, 1)])
+        self.assertCountEqual(board.neighbors((18, 5)), [(17, 5), (18, 4), (18, 6)])
+        self.assertCountEqual(board.neighbors((3, 3)), [(2, 3), (4, 3), (3, 2), (3, 4)])
+
+    def test_border_sentinel(self):
+        board = BadukBoard(5, 5)
+        self.assertEqual(board.board[board.point((0, 0)) - 1], BORDER)
+        self.assertEqual(board.board[board.point((4, 4)) + board.stride], BORDER)
+        self.assertEqual(board.coord(board.point((2, 3))), (2, 3))
+
+    def test_set_and_copy(self):
+        board = BadukBoard(9, 9)
+        board.set((2, 7), Color.WHITE)
+        copy = board.copy()
+        copy.set((2, 7), Color.EMPTY)
+        self.assertEqual(board.at((2, 7)), Color.WHITE)
+        self.assertEqual(board.serialize()[7][2], Color.WHITE)
+        self.assertEqual(copy.at((2, 7)), Color.EMPTY)
+
+    def test_chains_and_liberties(self):
+        board = BadukBoard(9, 9)
+        board.set((0, 0), Color.BLACK)
+        board.set((2, 0), Color.BLACK)
+        self.assertNotEqual(board.chain[board.point((0, 0))], board.chain[board.point((2, 0))])
+        board.set((1, 0), Color.BLACK)
+        head = board.chain[board.point((0, 0))]
+        self.assertEqual(head, board.chain[board.point((2, 0))])
+        self.assertEqual(len(board.liberties[head]), 4)
+        board.set((1, 1), Color.WHITE)
+        self.assertEqual(len(board.liberties[head]), 3)
+        board.set((1, 0), Color.EMPTY)
+        self.assertNotEqual(board.chain[board.point((0, 0))], board.chain[board.point((2, 0))])
+        self.assertEqual(board.liberties[board.chain[board.point((0, 0))]], {board.point((1, 0)), board.point((0, 1))})
+
+    def test_empty_points(self):
+        board = BadukBoard(5, 5)
+        board.set((1, 0), Color.BLACK)
+        board.set((0, 1), Color.BLACK)
+        board.set((0, 0), Color.WHITE)
+        self.assertEqual(len(board.empty_points), 22)
+        board.remove_chain(board.chain[board.point((0, 0))])
+        self.assertEqual(sorted(board.empty_points), sorted(point for point in board.points() if board.board[point] == 0))
+        for point in board.empty_points:
+            self.assertEqual(board.empty_points[board.empty_index[point]], point)
+
+    def test_area_score(self):
+        board = BadukBoard(5, 5)
+        # black walls off the two left columns and white the right column
+        for y in range(5):
+            board.set((2, y), Color.BLACK)
+            board.set((3, y), Color.WHITE)
+        self.assertEqual(board.area_score(), 15 - 10)
+        # a white stone inside makes the black region touch both colors
+        board.set((0, 2), Color.WHITE)
+        self.assertEqual(board.area_score(), 5 - 11)
+
+class TestQuantumGo(unittest.TestCase):
+    def play(self, game, moves):
+        for move in moves:
+            game.play_move(game.current_player, move)
+
+    def test_quantum_stones_are_mirrored(self):
+        game = QuantumGo()
+        self.play(game, [(3, 3), (15, 15)])
+        self.assertEqual(game.subgames[0].at((3, 3)), Color.BLACK)
+        self.assertEqual(game.subgames[0].at((15, 15)), Color.WHITE)
+        self.assertEqual(game.subgames[1].at((3, 3)), Color.WHITE)
+        self.assertEqual(game.subgames[1].at((15, 15)), Color.BLACK)
+
+    def test_corner_capture(self):
+        game = QuantumGo()
+        self.play(game, [(10, 10), (12, 12), (1, 0), (0, 0), (0, 1)])
+        for subgame in game.subgames:
+            self.assertEqual(subgame.at((0, 0)), Color.EMPTY)
+        self.assertEqual(game.captures[Color.BLACK], 2)
+
+    def test_ko_point(self):
+        game = QuantumGo()
+        self.play(game, [(10, 10), (12, 12)])
+        for subgame in game.subgames:
+            for coord in [(1, 0), (0, 1), (1, 2)]:
+                subgame.set(coord, Color.BLACK)
+            for coord in [(2, 0), (1, 1), (3, 1), (2, 2)]:
+                subgame.set(coord, Color.WHITE)
+        self.play(game, [(2, 1)])
+        for subgame in game.subgames:
+            self.assertEqual(subgame.ko_point, subgame.point((1, 1)))
+        self.play(game, [(15, 15)])
+        for subgame in game.subgames:
+            self.assertEqual(subgame.ko_point, 0)
+
+    def test_score_after_two_passes(self):
+        game = QuantumGo(5, 5)
+        self.play(game, [(0, 0), (4, 4), "pass", "pass"])
+        # one black and one white stone on each subgame, the empty points touch both
+        self.assertEqual(game.get_result(), "W+13.0")
+
+    def test_occupied_point(self):
+        game = QuantumGo()
+        self.play(game, [(10, 10), (12, 12), (1, 0)])
+        with self.assertRaises(ValueError):
+            game.play_move(Color.WHITE, (1, 0))
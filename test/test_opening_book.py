@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from opening_book import OpeningBook, write_book
+from build_book import build_book
+from engine import MCTS
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_lookup(self):
+        entries = {position_hash: (position_hash % 361, 100) for position_hash in range(7, 2 ** 64, 2 ** 58)}
+        write_book(self.path, 19, entries)
+        book = OpeningBook(self.path)
+        try:
+            self.assertEqual((len(book), book.get_size()), (len(entries), 19))
+            for position_hash, entry in entries.items():
+                self.assertEqual(book.get_entry(position_hash), entry)
+            self.assertIsNone(book.get_move(8))
+        finally:
+            book.close()
+
+    def test_not_a_book(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a book')
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+    def test_engine_plays_book_moves(self):
+        size, entries = build_book('--size 5 --playouts 30', 2, 2, 1, 0)
+        write_book(self.path, size, entries)
+        self.assertEqual(len(entries), 3)
+
+        engine = MCTS(playouts=10, size=5, book=self.path)
+        try:
+            root = engine.create_root()
+            root.create_children(root.get_board_state(), root.get_action_space(), root)
+            move = engine.get_book_move(root)
+            self.assertIn(move, [child.get_next_move() for child in root.get_children()])
+            # a position the builder did not search is left to the search
+            other = engine.create_root([24, 23, 22])
+            other.create_children(other.get_board_state(), other.get_action_space(), other)
+            self.assertIsNone(engine.get_book_move(other))
+        finally:
+            engine.close()
+
+        with self.assertRaises(ValueError):
+            MCTS(size=9, book=self.path)
+
+if __name__ == '__main__':
+    unittest.main()
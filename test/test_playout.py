@@ -0,0 +1,74 @@
+import random
+import unittest
+from local_simulator import QuantumGo, Color
+from playout import PlayoutPolicy, PlayoutLimits, simulate
+
+class TestPlayoutPolicy(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.game = QuantumGo(5, 5)
+        self.game.play_move(Color.BLACK, (4, 4))
+        self.game.play_move(Color.WHITE, (4, 0))
+
+    def test_eye_is_not_filled(self):
+        for coord in [(1, 0), (0, 1)]:
+            for subgame in self.game.subgames:
+                subgame.set(coord, Color.BLACK)
+        policy = PlayoutPolicy(self.game)
+        point = self.game.subgames[0].point((0, 0))
+        self.assertFalse(policy.is_playable(point, Color.BLACK.value))
+        self.assertFalse(policy.is_playable(point, Color.WHITE.value))
+
+    def test_capture_is_not_suicide(self):
+        for coord in [(1, 0), (0, 1)]:
+            for subgame in self.game.subgames:
+                subgame.set(coord, Color.BLACK)
+        for coord in [(2, 0), (1, 1), (0, 2)]:
+            for subgame in self.game.subgames:
+                subgame.set(coord, Color.WHITE)
+        policy = PlayoutPolicy(self.game)
+        point = self.game.subgames[0].point((0, 0))
+        self.assertTrue(policy.is_playable(point, Color.WHITE.value))
+
+    def test_only_empty_points_are_played(self):
+        policy = PlayoutPolicy(self.game)
+        for _ in range(10):
+            action = policy.select_action()
+            self.assertNotIn(action, [4 * 5 + 4, 4 * 5 + 0, self.game.geometry.pass_action])
+            self.game.play_move(self.game.current_player, (action // 5, action % 5))
+
+    def test_quantum_stone_is_not_repeated(self):
+        game = QuantumGo(5, 5)
+        game.play_move(Color.BLACK, (2, 2))
+        policy = PlayoutPolicy(game)
+        for _ in range(50):
+            self.assertNotEqual(policy.select_action(), 2 * 5 + 2)
+
+class TestSimulate(unittest.TestCase):
+    def test_playout_ends(self):
+        random.seed(0)
+        game = QuantumGo()
+        result = simulate([0, 20], game)
+        self.assertIsNotNone(result)
+        self.assertEqual(game.phase, "gameover")
+        self.assertEqual(game.consecutive_passes, 2)
+
+    def test_move_cap(self):
+        random.seed(0)
+        game = QuantumGo()
+        simulate([0, 20], game, PlayoutLimits(max_moves=30))
+        # both players pass once the cap is reached
+        self.assertEqual(game.move_number, 32)
+        self.assertEqual(PlayoutLimits().get_max_moves(9, 9), 3 * 81)
+
+    def test_mercy(self):
+        random.seed(0)
+        game = QuantumGo()
+        result = simulate([0, 20], game, PlayoutLimits(mercy=2))
+        self.assertIsNone(game.get_result())
+        leader = 'B' if game.captures[Color.BLACK] > game.captures[Color.WHITE] else 'W'
+        self.assertEqual(result, leader + '+M')
+        self.assertGreaterEqual(abs(game.captures[Color.BLACK] - game.captures[Color.WHITE]), 2)
+
+    def test_resigned_game(self):
+        self.assertEqual(simulate([0, 20, 362]), 'W')
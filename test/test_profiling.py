@@ -0,0 +1,25 @@
+import random
+import time
+import unittest
+from local_simulator import QuantumGo
+from playout import simulate
+from profiling import PhaseTimer
+
+class TestPhaseTimer(unittest.TestCase):
+    def test_add_and_reset(self):
+        timer = PhaseTimer()
+        timer.add('selection', time.perf_counter())
+        timer.add('selection', time.perf_counter())
+        self.assertEqual(timer.get_phases()['selection'][0], 2)
+        self.assertIn('selection', timer.report())
+        timer.reset()
+        self.assertEqual(timer.get_phases(), {})
+
+    def test_playout_phases(self):
+        random.seed(0)
+        timer = PhaseTimer()
+        simulate([0, 20], QuantumGo(), None, timer)
+        phases = timer.get_phases()
+        for phase in ['replay', 'move generation', 'board update', 'captures', 'scoring']:
+            self.assertIn(phase, phases)
+        self.assertEqual(phases['scoring'][0], 1)
@@ -0,0 +1,74 @@
+import unittest
+from rollout_pool import RolloutPool, LocalRollouts
+from local_simulator import LocalSimulator
+from engine import MCTS
+
+class TestRolloutPool(unittest.TestCase):
+    def test_run(self):
+        rollout_pool = RolloutPool(2)
+        try:
+            board_states = [[0, 20], [0, 20, 40], [0, 20, 362]]
+            results = rollout_pool.run(board_states)
+        finally:
+            rollout_pool.close()
+        self.assertEqual(len(results), 3)
+        # black resigns on the third move
+        self.assertEqual(results[2], 'W')
+        for result in results:
+            self.assertIn(result[0], 'BWT')
+
+    def test_run_on_small_board(self):
+        # board states without a position start from an empty board of the pool's size
+        rollout_pool = RolloutPool(2, size=5)
+        try:
+            results = rollout_pool.run([[0, 24], [0, 24, 26]])
+        finally:
+            rollout_pool.close()
+        # black resigns on the third move
+        self.assertEqual(results[1], 'W')
+        for simulator in ['numpy', 'bitboard']:
+            results = LocalRollouts(simulator, size=5).run([[0, 24], [0, 24, 26]])
+            self.assertEqual(results[1], 'W')
+            self.assertIn(results[0][0], 'BWT')
+
+    def test_run_from_position(self):
+        # the position is sent to the workers with its geometry
+        simulator = LocalSimulator(size=5)
+        simulator.play_moves([0, 24])
+        rollout_pool = RolloutPool(2)
+        try:
+            results = rollout_pool.run([[0, 24, 12], [0, 24, 12, 13]], simulator.game)
+        finally:
+            rollout_pool.close()
+        self.assertEqual(len(results), 2)
+
+    def test_root_parallel_search(self):
+        engine = MCTS(playouts=40, workers=2, parallel='root', seed=0, size=5)
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        try:
+            self.assertEqual(engine.search(root), 40)
+        finally:
+            engine.close()
+        self.assertEqual(sum(child.get_games_played() for child in root.get_children()), 40)
+
+    def test_root_parallel_simulator(self):
+        # every worker searches its tree with the engine's simulator
+        engine = MCTS(playouts=40, workers=2, parallel='root', simulator='bitboard', seed=0, size=5)
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        try:
+            self.assertEqual(engine.search(root), 40)
+        finally:
+            engine.close()
+
+    def test_rollout_parallel_budget(self):
+        # expanded leaves have more children than the budget has left, only that many are simulated
+        engine = MCTS(playouts=30, workers=2, seed=0, size=5)
+        root = engine.create_root()
+        root.create_children(root.get_board_state(), root.get_action_space(), root)
+        try:
+            self.assertEqual(engine.search(root), 30)
+        finally:
+            engine.close()
+        self.assertEqual(root.get_games_played(), 30)
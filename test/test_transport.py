@@ -0,0 +1,127 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from action_space import reverse_action_map_19x19
+from transport import HttpTransport, MoveFeed, SgfMoveReader, encode_move, get_credentials, make_session, parse_sgf_moves, URL_LOCALHOST, URL_PRODUCTION
+
+class GameServer(BaseHTTPRequestHandler):
+    # stand-in for the game server: one game whose moves are kept as SGF
+    moves = []
+    requests = []
+
+    def reply(self, body, content_type='application/json', etag=None):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        GameServer.requests.append((self.path, body))
+        if self.path == '/api/game':
+            self.reply(json.dumps({'id': 'g1'}).encode())
+        elif self.path == '/api/game/g1/move':
+            color = 'B' if len(GameServer.moves) % 2 == 0 else 'W'
+            GameServer.moves.append(f';{color}[{body["0"]}]')
+            self.reply(b'{}')
+        else:
+            self.reply(b'{}')
+
+    def do_GET(self):
+        etag = f'"{len(GameServer.moves)}"'
+        GameServer.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.reply(('(;GM[1]' + ''.join(GameServer.moves) + ')').encode(), 'text/plain', etag)
+
+    def log_message(self, *args):
+        pass
+
+class TestTransport(unittest.TestCase):
+    def test_parse_sgf_moves(self):
+        moves = parse_sgf_moves('(;GM[1]SZ[19];B[aa];W[sb];B[cd])')
+        self.assertEqual(moves, [reverse_action_map_19x19[(0, 0)], reverse_action_map_19x19[(18, 1)], reverse_action_map_19x19[(2, 3)]])
+
+    def test_parse_passes(self):
+        self.assertEqual(parse_sgf_moves('(;B[];W[tt];B[aa])'), [361, 361, reverse_action_map_19x19[(0, 0)]])
+
+    def test_move_reader(self):
+        reader = SgfMoveReader()
+        self.assertEqual(reader.read('(;GM[1];B[aa]'), [reverse_action_map_19x19[(0, 0)]])
+        self.assertEqual(reader.read('(;GM[1];B[aa];W[bb])'), [reverse_action_map_19x19[(0, 0)], reverse_action_map_19x19[(1, 1)]])
+        # a record that is not a continuation is read again from the start
+        self.assertEqual(reader.read('(;GM[1];B[cc])'), [reverse_action_map_19x19[(2, 2)]])
+
+    def test_wait_without_server(self):
+        # nothing listens on the port, the read is retried until the timeout
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            port = unused.getsockname()[1]
+        feed = MoveFeed(make_session(1), f'http://127.0.0.1:{port}/api/game/g1/sgf')
+        start = time.monotonic()
+        self.assertEqual(feed.wait_for_moves(0, timeout=0.3), [])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_check_without_server(self):
+        # a check that does not wait returns the moves read so far, and the next one waits out the backoff
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            port = unused.getsockname()[1]
+        feed = MoveFeed(make_session(1), f'http://127.0.0.1:{port}/api/game/g1/sgf')
+        self.assertEqual(feed.wait_for_moves(0, 0), [])
+        self.assertEqual(feed.failures, 1)
+        self.assertEqual(feed.wait_for_moves(0, 0), [])
+        self.assertEqual(feed.failures, 1)
+
+    def test_credentials(self):
+        # the test account on the local server, the bot's account elsewhere, unless others are given
+        self.assertEqual(HttpTransport(URL_LOCALHOST).username, get_credentials(URL_LOCALHOST)[0])
+        self.assertEqual(HttpTransport(URL_PRODUCTION).username, get_credentials(URL_PRODUCTION)[0])
+        self.assertNotEqual(get_credentials(URL_LOCALHOST), get_credentials(URL_PRODUCTION))
+        self.assertEqual(HttpTransport(URL_LOCALHOST, 'bot', 'secret').username, 'bot')
+
+    def test_encode_move(self):
+        self.assertEqual(encode_move(361), 'pass')
+        self.assertEqual(encode_move(362), 'resign')
+        self.assertEqual(encode_move(reverse_action_map_19x19[(2, 3)]), 'cd')
+
+    def test_http_transport(self):
+        GameServer.moves = []
+        GameServer.requests = []
+        server = HTTPServer(('127.0.0.1', 0), GameServer)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        transport = HttpTransport(f'http://127.0.0.1:{server.server_port}/', 'bot', 'secret')
+        try:
+            transport.start()
+            action = reverse_action_map_19x19[(3, 3)]
+            transport.play_move(action)
+            self.assertEqual(transport.get_moves(), [action])
+            # the reply arrives while the transport waits for it
+            reply = reverse_action_map_19x19[(15, 15)]
+            timer = threading.Timer(0.2, lambda: GameServer.moves.append(';W[pp]'))
+            timer.start()
+            self.assertEqual(transport.wait_for_moves(1, timeout=5), [action, reply])
+            timer.join()
+            self.assertEqual(transport.wait_for_moves(2, timeout=0.1), [action, reply])
+        finally:
+            transport.close()
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(GameServer.requests[0], ('/api/login', {'username': 'bot', 'password': 'secret'}))
+        self.assertEqual(transport.get_game_id(), 'g1')
+        self.assertIn(('/api/game/g1/sit_down/0', None), GameServer.requests)
+        # reads of an unchanged game send the ETag of the record they already have
+        self.assertIn(('/api/game/g1/sgf', '"1"'), GameServer.requests)
+
+if __name__ == '__main__':
+    unittest.main()
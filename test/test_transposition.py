@@ -0,0 +1,52 @@
+import unittest
+from local_simulator import QuantumGo
+from transposition import TranspositionEntry, TranspositionTable
+
+class TestZobristHash(unittest.TestCase):
+    def play(self, moves):
+        game = QuantumGo()
+        for move in moves:
+            game.play_move(game.current_player, move)
+        return game
+
+    def test_transposed_move_orders(self):
+        first = self.play([(3, 3), (15, 15), (4, 4), (16, 16), (5, 5), (17, 17)])
+        second = self.play([(3, 3), (15, 15), (5, 5), (17, 17), (4, 4), (16, 16)])
+        self.assertEqual(first.get_hash(), second.get_hash())
+        self.assertEqual(first.get_hash(), first.compute_hash())
+
+    def test_quantum_stones_and_player_to_move(self):
+        self.assertNotEqual(self.play([(3, 3), (15, 15)]).get_hash(), self.play([(15, 15), (3, 3)]).get_hash())
+        self.assertNotEqual(self.play([(3, 3), (15, 15)]).get_hash(), self.play([(3, 3), (15, 15), 'pass']).get_hash())
+        self.assertNotEqual(self.play([(3, 3), (15, 15), 'pass']).get_hash(), self.play([(3, 3), (15, 15), 'pass', (4, 4), 'pass']).get_hash())
+
+    def test_capture(self):
+        game = self.play([(10, 10), (12, 12), (1, 0), (0, 0), (0, 1)])
+        self.assertEqual(game.get_hash(), game.compute_hash())
+        self.assertEqual(game.copy().get_hash(), game.get_hash())
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_lru(self):
+        table = TranspositionTable(2, 'lru')
+        table.put(1, TranspositionEntry(0, 0))
+        table.put(2, TranspositionEntry(0, 0))
+        table.get(1)
+        table.put(3, TranspositionEntry(0, 0))
+        self.assertIsNotNone(table.get(1))
+        self.assertIsNone(table.get(2))
+
+    def test_fifo(self):
+        table = TranspositionTable(2, 'fifo')
+        table.put(1, TranspositionEntry(0, 0))
+        table.put(2, TranspositionEntry(0, 0))
+        table.get(1)
+        table.put(3, TranspositionEntry(0, 0))
+        self.assertIsNone(table.get(1))
+        self.assertEqual(len(table), 2)
+
+    def test_visits(self):
+        table = TranspositionTable(4, 'visits')
+        for position_hash, games_played in enumerate([5, 1, 7, 2]):
+            table.put(position_hash, TranspositionEntry(games_played, 0))
+        table.put(4, TranspositionEntry(0, 0))
+        self.assertEqual(sorted(table.entries), [0, 2, 4])
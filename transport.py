@@ -0,0 +1,283 @@
+import random
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from geometry import make_geometry
+from private import PASSWORD_PRODUCTION, PASSWORD_LOCALHOST
+
+# how the engine talks to the game server. every transport logs in, creates a game and takes the black
+# seat in start, plays the engine's moves with play_move and reads the moves of the game with get_moves,
+# or waits for the opponent's reply with wait_for_moves. the selenium transport drives the website in a
+# headless Chrome, the http transport calls the server's API directly and many of them can share one
+# pooled session. both read the moves from a MoveFeed
+
+URL_PRODUCTION = 'https://www.govariants.com/'
+URL_LOCALHOST = 'http://localhost:5173/'
+
+# the bot's account, and the test account of a local server
+USERNAME_PRODUCTION = 'QuantumBot'
+USERNAME_LOCALHOST = 'QuantumBotTest'
+
+VARIANT = 'quantum'
+# board size of the games unless another one is given
+SIZE = 19
+
+# seat of the engine, it plays black
+BLACK_SEAT = 0
+
+# API routes of the game server, relative to its URL
+LOGIN_PATH = 'api/login'
+GAME_PATH = 'api/game'
+SEAT_PATH = 'api/game/{}/sit_down/{}'
+MOVE_PATH = 'api/game/{}/move'
+SGF_PATH = 'api/game/{}/sgf'
+
+# seconds before a request to the game server is given up
+REQUEST_TIMEOUT = 10
+# connections kept open per host by a pooled session, enough for one request per game of a busy host
+POOL_SIZE = 32
+# seconds the website needs to show a move before the next one is read from it
+SELENIUM_MOVE_DELAY = 2
+# seconds between reads of the game while waiting for a move. the wait starts short so a reply is seen
+# within the first poll or two and grows while the opponent thinks
+MIN_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+POLL_BACKOFF = 1.5
+# seconds before the first retry of a failed read, doubled after every failure in a row up to the maximum
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30
+
+# a move with its letter coordinates, empty or "tt" for a pass
+SGF_MOVE = re.compile(r';[BW]\[([a-z]{2})?\]')
+
+def parse_sgf_move(coordinates, geometry):
+
+    # the action of the letter coordinates, 'invalid' when they are off the board
+    if not coordinates or coordinates == 'tt':
+        return geometry.pass_action
+    return geometry.sgf_actions.get(coordinates, 'invalid')
+
+def parse_sgf_moves(sgf, size=SIZE):
+
+    # actions of the moves in an SGF record
+    geometry = make_geometry(size)
+    return [parse_sgf_move(coordinates, geometry) for coordinates in SGF_MOVE.findall(sgf)]
+
+class SgfMoveReader:
+
+    # the actions of a game's SGF record as it grows. the text up to the end of the last move read is
+    # kept, and only what comes after it in the next record is parsed. a record that does not start with
+    # that text is parsed from the beginning
+
+    def __init__(self, size=SIZE):
+        self.geometry = make_geometry(size)
+        self.text = ''
+        self.moves = []
+
+    def get_moves(self):
+        return list(self.moves)
+
+    def read(self, sgf):
+        if not sgf.startswith(self.text):
+            self.text = ''
+            self.moves = []
+        position = len(self.text)
+        for match in SGF_MOVE.finditer(sgf, position):
+            self.moves.append(parse_sgf_move(match.group(1), self.geometry))
+            position = match.end()
+        self.text = sgf[:position]
+        return self.get_moves()
+
+class MoveFeed:
+
+    # the moves of a game from its SGF route on a persistent session. reads are conditional on the ETag of
+    # the last record, so polling an unchanged game only costs the headers, and only new moves are parsed
+
+    def __init__(self, session, url, size=SIZE):
+        self.session = session
+        self.url = url
+        self.etag = None
+        self.reader = SgfMoveReader(size)
+        # failed reads in a row and the time before which the next read is not tried, kept between waits
+        # so short waits, like the ones between ponder slices, back off as well
+        self.failures = 0
+        self.retry_at = 0
+
+    def get_moves(self):
+        headers = {} if self.etag is None else {'If-None-Match': self.etag}
+        response = self.session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            return self.reader.get_moves()
+        response.raise_for_status()
+        self.etag = response.headers.get('ETag')
+        return self.reader.read(response.content.decode('utf-8'))
+
+    def wait_for_moves(self, count, timeout=None):
+
+        # the moves once the game has more than count of them, or the moves read so far once timeout
+        # seconds have passed. failed reads are retried after a growing delay with some jitter, so the
+        # bots of a host do not all retry a struggling server at once
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = MIN_POLL_INTERVAL
+
+        while True:
+            delay = self.retry_at - time.monotonic()
+            if delay <= 0:
+                try:
+                    moves = self.get_moves()
+                    self.failures = 0
+                    if len(moves) > count:
+                        return moves
+                    delay = interval
+                    interval = min(MAX_POLL_INTERVAL, interval * POLL_BACKOFF)
+                except requests.RequestException as error:
+                    self.failures += 1
+                    delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (self.failures - 1)) * random.uniform(0.5, 1)
+                    self.retry_at = time.monotonic() + delay
+                    print(f"Reading the game failed ({error}), retrying in {delay:.1f} seconds")
+
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return self.reader.get_moves()
+            time.sleep(delay)
+
+def encode_move(action, size=SIZE):
+
+    # the move as the server expects it: "pass", "resign" or the letter coordinates of the point
+    geometry = make_geometry(size)
+    if geometry.is_point(action):
+        return geometry.sgf_points[action]
+    return geometry.moves[action]
+
+def get_credentials(url):
+
+    # the username and password the transports log in with on the server at url
+    if url == URL_LOCALHOST:
+        return USERNAME_LOCALHOST, PASSWORD_LOCALHOST
+    return USERNAME_PRODUCTION, PASSWORD_PRODUCTION
+
+def make_session(pool_size=POOL_SIZE):
+
+    # a requests session that keeps up to pool_size connections to the server open and reuses them
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def make_transport(name, url=URL_PRODUCTION, size=SIZE):
+
+    if name == 'selenium':
+        return SeleniumTransport(url, size)
+    if name == 'http':
+        return HttpTransport(url, size=size)
+    raise ValueError(f"Unknown transport: {name}")
+
+class SeleniumTransport:
+
+    # the website at url in a headless Chrome, one browser per game
+
+    def __init__(self, url=URL_PRODUCTION, size=SIZE):
+        # selenium is only needed by this transport
+        from web_board import Board, Player
+
+        self.url = url
+        self.size = size
+        self.board = Board(size, url)
+        self.player = Player('black', self.board.get_driver(), size)
+        self.session = requests.Session()
+        self.feed = None
+
+    def start(self):
+        self.board.login()
+        self.board.create_game()
+        self.player.take_seat()
+        self.feed = MoveFeed(self.session, self.url + SGF_PATH.format(self.board.game_id), self.size)
+
+    def play_move(self, action):
+        self.player.make_move(action)
+        time.sleep(SELENIUM_MOVE_DELAY)
+
+    def get_moves(self):
+        return self.feed.get_moves()
+
+    def wait_for_moves(self, count, timeout=None):
+        return self.feed.wait_for_moves(count, timeout)
+
+    def opponent_passed(self):
+        #issue #8
+        self.player.select_player()
+
+    def close(self):
+        self.session.close()
+
+class HttpTransport:
+
+    # the game server's API over a requests session. a session passed in is shared with other games and is
+    # left open by close. without a username and password the account of the server at url is used
+
+    def __init__(self, url=URL_PRODUCTION, username=None, password=None, session=None, size=SIZE):
+        self.url = url
+        self.size = size
+        if username is None:
+            username, password = get_credentials(url)
+        self.username = username
+        self.password = password
+        self.owns_session = session is None
+        self.session = make_session() if session is None else session
+        self.game_id = None
+        self.feed = None
+
+    def get_game_id(self):
+        return self.game_id
+
+    def request(self, method, path, **kwargs):
+        response = self.session.request(method, self.url + path, timeout=REQUEST_TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def start(self):
+        self.login()
+        self.create_game()
+        self.take_seat()
+
+    def join(self, game_id):
+        # plays black in a game created by someone else
+        self.login()
+        self.game_id = game_id
+        self.feed = MoveFeed(self.session, self.url + SGF_PATH.format(self.game_id), self.size)
+        self.take_seat()
+
+    def login(self):
+        self.request('POST', LOGIN_PATH, json={'username': self.username, 'password': self.password})
+        print("Logged in as", self.username)
+
+    def create_game(self):
+        response = self.request('POST', GAME_PATH, json={'variant': VARIANT, 'config': {'width': self.size, 'height': self.size}})
+        self.game_id = response.json()['id']
+        self.feed = MoveFeed(self.session, self.url + SGF_PATH.format(self.game_id), self.size)
+        print("Game created:", self.url + "game/" + self.game_id)
+
+    def take_seat(self):
+        self.request('POST', SEAT_PATH.format(self.game_id, BLACK_SEAT))
+
+    def play_move(self, action):
+        self.request('POST', MOVE_PATH.format(self.game_id), json={str(BLACK_SEAT): encode_move(action, self.size)})
+
+    def get_moves(self):
+        return self.feed.get_moves()
+
+    def wait_for_moves(self, count, timeout=None):
+        return self.feed.wait_for_moves(count, timeout)
+
+    def opponent_passed(self):
+        # the seat stays taken through passes, unlike on the website
+        pass
+
+    def close(self):
+        if self.owns_session:
+            self.session.close()
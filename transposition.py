@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+class TranspositionEntry:
+
+    # playout statistics of one position, shared by every node that reaches it
+
+    __slots__ = ('games_played', 'games_won')
+
+    def __init__(self, games_played, games_won):
+        self.games_played = games_played
+        self.games_won = games_won
+
+class TranspositionTable:
+
+    # statistics of the positions seen by the search, keyed by QuantumGo.get_hash(). when the table is full
+    # an entry is evicted according to the eviction policy: lru drops the least recently used entry, fifo
+    # the oldest one, and visits drops the half of the table with the fewest playouts
+
+    def __init__(self, max_entries, eviction='lru'):
+        if eviction not in ('lru', 'fifo', 'visits'):
+            raise ValueError(f"Unknown eviction policy {eviction}")
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, position_hash):
+        entry = self.entries.get(position_hash)
+        if entry is not None and self.eviction == 'lru':
+            self.entries.move_to_end(position_hash)
+        return entry
+
+    def put(self, position_hash, entry):
+        if position_hash not in self.entries and len(self.entries) >= self.max_entries:
+            self.evict()
+        self.entries[position_hash] = entry
+
+    def evict(self):
+        if self.eviction == 'visits':
+            # dropping half of the table at once keeps the sort amortized O(log n) per insertion
+            entries = sorted(self.entries.items(), key=lambda item: item[1].games_played)
+            for position_hash, entry in entries[:max(1, len(entries) // 2)]:
+                del self.entries[position_hash]
+        else:
+            self.entries.popitem(last=False)
@@ -10,28 +10,19 @@ from selenium.common.exceptions import NoSuchElementException
 import requests
 import re
 
-from offset_moves import get_offset_5x5, get_offset_9x9, get_offset_19x19
-from action_space import action_map_5x5, reverse_action_map_5x5, action_map_9x9, reverse_action_map_9x9, action_map_19x19, reverse_action_map_19x19
-from private import PASSWORD_PRODUCTION, PASSWORD_LOCALHOST
-
-URL_PRODUCTION = 'https://www.govariants.com/'
-URL_LOCALHOST = 'http://localhost:5173/'
+from transport import parse_sgf_moves, get_credentials, URL_PRODUCTION
+from geometry import make_geometry
 
 VARIANT = 'quantum'
-WIDTH = 19
-HEIGHT = 19
-
-USERNAME_PRODUCTION = 'QuantumBot'
-PASSWORD_PRODUCTION = PASSWORD_PRODUCTION
-
-USERNAME_LOCALHOST = 'QuantumBotTest'
-PASSWORD_LOCALHOST = PASSWORD_LOCALHOST
 
 class Board:
 
-    def __init__(self):
+    def __init__(self, size=19, url=URL_PRODUCTION):
         
         self.game_id = None
+        self.size = size
+        self.url = url
+        self.username, self.password = get_credentials(url)
 
         self.stone_coordinates = []
         
@@ -50,23 +41,23 @@ class Board:
     
     def login(self):
 
-        self.driver.get(URL_PRODUCTION + "login")
+        self.driver.get(self.url + "login")
         self.driver.implicitly_wait(10)  # Wait for the page to load completely
 
         print("At login page Current URL:", self.driver.current_url)
 
         username_input = self.driver.find_element(By.XPATH, '//input[@id="username"]')
         username_input.clear()
-        username_input.send_keys(USERNAME_PRODUCTION)
+        username_input.send_keys(self.username)
 
         password_input = self.driver.find_element(By.XPATH, '//input[@id="current-password"]')
         password_input.clear()
-        password_input.send_keys(PASSWORD_PRODUCTION)
+        password_input.send_keys(self.password)
 
         login_button = self.driver.find_element(By.XPATH, '//button[@type="submit" and contains(text(), "Log in")]')
         login_button.click()
 
-        WebDriverWait(self.driver, 10).until(EC.url_to_be(URL_PRODUCTION))
+        WebDriverWait(self.driver, 10).until(EC.url_to_be(self.url))
 
         print("Logged in. Current URL:", self.driver.current_url)
 
@@ -77,11 +68,11 @@ class Board:
 
         width_input = self.driver.find_element(By.XPATH, '//form[@class="config-form-column"]//label[text()="Width"]/following-sibling::input[@type="number"]')
         width_input.clear()
-        width_input.send_keys(WIDTH)
+        width_input.send_keys(self.size)
 
         height_input = self.driver.find_element(By.XPATH, '//form[@class="config-form-column"]//label[text()="Height"]/following-sibling::input[@type="number"]')
         height_input.clear()
-        height_input.send_keys(HEIGHT)
+        height_input.send_keys(self.size)
 
         create_game_button = self.driver.find_element(By.XPATH, '//div[@class="game-creation-form"]//button[text()="Create Game"]')
         create_game_button.click()
@@ -94,14 +85,9 @@ class Board:
 
     def get_sgf_data(self):
 
-        response = requests.get(URL_PRODUCTION + "api/game/" + self.game_id + "/sgf")
+        response = requests.get(self.url + "api/game/" + self.game_id + "/sgf")
         if response.status_code == 200:
-            sgf_data = re.findall(r';[BW]\[[a-z]{2}\]',response.content.decode('utf-8'))
-            processed_actions = []
-            for move in sgf_data:
-                #converts letter coordinates to numerical coordinates then gets the key corrresponding to the numerical coordinates and adds it to processed_actions list
-                processed_actions.append(reverse_action_map_19x19.get(tuple([ord(move[3:-1][0])-ord('a'), ord(move[3:-1][1])-ord('a')]), 'invalid'))
-            return processed_actions
+            return parse_sgf_moves(response.content.decode('utf-8'), self.size)
         else: 
             print("Error getting game moves")
 
@@ -151,10 +137,11 @@ class Board:
 
 class Player:
 
-    def __init__(self, color, board_driver):
+    def __init__(self, color, board_driver, size=19):
 
         self.color = color
         self.driver = board_driver
+        self.geometry = make_geometry(size)
 
     def get_color(self):
         return self.color
@@ -164,11 +151,11 @@ class Player:
         take_seat_button.click()
 
     def make_move(self, action):
-        if action == 361:
+        if action == self.geometry.pass_action:
             #press pass button
             pass_button = self.driver.find_element(By.XPATH, '//button[contains(text(), "Pass")]')
             pass_button.click()
-        elif action == 362:
+        elif action == self.geometry.resign_action:
             #press resign button
             resign_button = self.driver.find_element(By.XPATH, '//button[contains(text(), "Resign")]')
             resign_button.click()
@@ -177,7 +164,7 @@ class Player:
                 EC.presence_of_element_located((By.CSS_SELECTOR, 'svg.board'))
             )
             # we need the offset because it corresponds an action to a specific spot on the board for the driver to click on 
-            offset_x, offset_y = get_offset_19x19(action_map_19x19[action])
+            offset_x, offset_y = self.geometry.get_click_offset(action)
             action_chains = ActionChains(self.driver)
             action_chains.move_to_element_with_offset(board_svg, int(offset_x), int(offset_y)).click().perform()
 